@@ -42,7 +42,8 @@ class TTSChunk {
     this.error,
   });
 
-  factory TTSChunk.fromJson(Map<String, dynamic> json) {
+  /// [audioBytes] is given when the audio arrived as a separate binary frame.
+  factory TTSChunk.fromJson(Map<String, dynamic> json, {Uint8List? audioBytes}) {
     final type = json['type'] as String?;
 
     if (type == 'error') {
@@ -80,7 +81,7 @@ class TTSChunk {
 
     // Parse chunk data
     final audioB64 = json['audio'] as String? ?? '';
-    final audioBytes =
+    audioBytes ??=
         audioB64.isNotEmpty ? base64Decode(audioB64) : Uint8List(0);
 
     return TTSChunk(
@@ -193,6 +194,9 @@ class TTSStreamHandler {
   final List<int> _accumulatedDurations = [];
   String _currentText = '';
 
+  // chunk_meta waiting for its binary audio frame
+  Map<String, dynamic>? _pendingMeta;
+
   TTSStreamHandler({required this.serverUrl});
 
   /// Stream of audio chunks as they arrive
@@ -217,7 +221,11 @@ class TTSStreamHandler {
     VoiceAssistantLogger.info('Connecting to TTS server: $serverUrl');
 
     try {
-      _channel = WebSocketChannel.connect(Uri.parse(serverUrl));
+      // Ask for audio as binary frames instead of base64 inside JSON
+      final uri = Uri.parse(serverUrl);
+      _channel = WebSocketChannel.connect(uri.replace(
+        queryParameters: {...uri.queryParameters, 'format': 'binary'},
+      ));
 
       // Wait for the connection to be established
       await _channel!.ready;
@@ -251,59 +259,80 @@ class TTSStreamHandler {
 
   void _handleMessage(dynamic message) {
     try {
-      final data = jsonDecode(message as String) as Map<String, dynamic>;
-      final chunk = TTSChunk.fromJson(data);
-
-      // Skip control messages
-      if (chunk.isControlMessage) {
-        VoiceAssistantLogger.debug('Received control message');
+      if (message is! String) {
+        // Binary audio frame; its alignment came in the preceding chunk_meta
+        final meta = _pendingMeta;
+        _pendingMeta = null;
+        if (meta == null) {
+          VoiceAssistantLogger.warning('Audio frame without chunk_meta, dropping');
+          return;
+        }
+        final bytes = message is Uint8List
+            ? message
+            : Uint8List.fromList(message as List<int>);
+        _handleChunk(TTSChunk.fromJson(meta, audioBytes: bytes));
         return;
       }
 
-      if (chunk.error != null) {
-        VoiceAssistantLogger.error('TTS error: ${chunk.error}');
-        _chunkController.addError(Exception(chunk.error));
+      final data = jsonDecode(message) as Map<String, dynamic>;
+      if (data['type'] == 'chunk_meta') {
+        _pendingMeta = data;
         return;
       }
+      _handleChunk(TTSChunk.fromJson(data));
+    } catch (e, st) {
+      VoiceAssistantLogger.error('Error parsing TTS message', e, st);
+    }
+  }
 
-      if (chunk.isComplete) {
-        VoiceAssistantLogger.info(
-            'TTS stream complete. Total chars: ${_accumulatedChars.length}');
-
-        // Emit complete alignment
-        final alignment = TTSAlignment(
-          fullText: _currentText,
-          chars: List.from(_accumulatedChars),
-          charStartTimes: List.from(_accumulatedTimes),
-          charDurations: List.from(_accumulatedDurations),
-        );
+  void _handleChunk(TTSChunk chunk) {
+    // Skip control messages
+    if (chunk.isControlMessage) {
+      VoiceAssistantLogger.debug('Received control message');
+      return;
+    }
 
-        _alignmentController.add(alignment);
+    if (chunk.error != null) {
+      VoiceAssistantLogger.error('TTS error: ${chunk.error}');
+      _chunkController.addError(Exception(chunk.error));
+      return;
+    }
 
-        VoiceAssistantLogger.debug('Emitted alignment: $alignment');
+    if (chunk.isComplete) {
+      VoiceAssistantLogger.info(
+          'TTS stream complete. Total chars: ${_accumulatedChars.length}');
 
-        // Clear accumulators for next utterance
-        _accumulatedChars.clear();
-        _accumulatedTimes.clear();
-        _accumulatedDurations.clear();
+      // Emit complete alignment
+      final alignment = TTSAlignment(
+        fullText: _currentText,
+        chars: List.from(_accumulatedChars),
+        charStartTimes: List.from(_accumulatedTimes),
+        charDurations: List.from(_accumulatedDurations),
+      );
 
-        _chunkController.add(chunk);
-        return;
-      }
+      _alignmentController.add(alignment);
 
-      // Accumulate alignment data
-      _accumulatedChars.addAll(chunk.chars);
-      _accumulatedTimes.addAll(chunk.charStartTimes);
-      _accumulatedDurations.addAll(chunk.charDurations);
+      VoiceAssistantLogger.debug('Emitted alignment: $alignment');
 
-      VoiceAssistantLogger.debug(
-          'Received chunk ${chunk.chunkIndex}: ${chunk.audioBytes.length} bytes, '
-          '${chunk.chars.length} chars');
+      // Clear accumulators for next utterance
+      _accumulatedChars.clear();
+      _accumulatedTimes.clear();
+      _accumulatedDurations.clear();
 
       _chunkController.add(chunk);
-    } catch (e, st) {
-      VoiceAssistantLogger.error('Error parsing TTS message', e, st);
+      return;
     }
+
+    // Accumulate alignment data
+    _accumulatedChars.addAll(chunk.chars);
+    _accumulatedTimes.addAll(chunk.charStartTimes);
+    _accumulatedDurations.addAll(chunk.charDurations);
+
+    VoiceAssistantLogger.debug(
+        'Received chunk ${chunk.chunkIndex}: ${chunk.audioBytes.length} bytes, '
+        '${chunk.chars.length} chars');
+
+    _chunkController.add(chunk);
   }
 
   /// Request TTS for the given text (single-shot mode)
@@ -382,6 +411,7 @@ class TTSStreamHandler {
 
     await _channel?.sink.close();
     _channel = null;
+    _pendingMeta = null;
 
     _updateConnectionState(false);
   }
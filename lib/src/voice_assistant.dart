@@ -316,10 +316,7 @@ class VoiceAssistant {
         if (text.isNotEmpty) {
           // First chunk of a new response
           if (!_isReceivingResponse) {
-            _isReceivingResponse = true;
-            _displayText.clear();
-            _audioPlayer?.reset();
-            VoiceAssistantLogger.info('New response started - agent handles TTS');
+            _beginResponse();
           }
           
           // Accumulate for display
@@ -334,8 +331,23 @@ class VoiceAssistant {
         }
       }
       
+      // Handle response start marker from agent (text chunks may be disabled)
+      else if (type == 'assistant_response_start') {
+        if (!_isReceivingResponse) {
+          _beginResponse();
+        }
+      }
+      
       // Handle response end marker from agent
       else if (type == 'assistant_response_end') {
+        // Text chunks travel on the lossy channel, the full text is authoritative
+        final fullText = data['full_text'] as String? ?? '';
+        if (fullText.isNotEmpty && fullText != _displayText.toString()) {
+          _displayText.clear();
+          _displayText.write(fullText);
+          _textController.add(fullText);
+        }
+
         if (_isReceivingResponse) {
           _isReceivingResponse = false;
           VoiceAssistantLogger.info('Response ended');
@@ -356,6 +368,14 @@ class VoiceAssistant {
     }
   }
 
+  /// Reset display text and audio for a new agent response
+  void _beginResponse() {
+    _isReceivingResponse = true;
+    _displayText.clear();
+    _audioPlayer?.reset();
+    VoiceAssistantLogger.info('New response started - agent handles TTS');
+  }
+
   /// Start single-shot TTS (for legacy support)
   Future<void> _startSingleShotTTS(String text) async {
     if (_ttsHandler == null) return;
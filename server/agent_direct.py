@@ -13,195 +13,470 @@ This agent streams the entire LLM response as ONE continuous TTS stream.
 """
 
 import logging
+import logging.handlers
 import asyncio
-import json
+import atexit
 import os
+import queue
+import sys
 from typing import Optional, List
 import aiohttp
+import httpx
+import numpy as np
+import orjson
 from openai import AsyncOpenAI
 from dotenv import load_dotenv
 from livekit import agents, rtc
+from livekit.agents import stt
 from livekit.agents.vad import VADEventType
 from livekit.plugins import silero
 from livekit.plugins import openai as lk_openai
 
 load_dotenv()
 
-# Configure logging
+# libuv-based event loop for the socket-heavy agent (not available on Windows).
+# Installed at import time so job subprocesses pick it up as well.
+if sys.platform != "win32":
+    import uvloop
+    uvloop.install()
+
+# Configure logging - records are queued and written by a background thread
+_log_handlers = [
+    logging.FileHandler('agent_direct_debug.log', delay=True),
+    logging.StreamHandler()
+]
+for _handler in _log_handlers:
+    _handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_log_listener = logging.handlers.QueueListener(_log_queue, *_log_handlers)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
 logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('agent_direct_debug.log'),
-        logging.StreamHandler()
-    ]
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format='%(message)s',  # Full format is applied by the listener's handlers
+    handlers=[logging.handlers.QueueHandler(_log_queue)]
 )
 logger = logging.getLogger(__name__)
 
 # Environment variables
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 TTS_WS_URL = os.getenv("TTS_WS_URL", "ws://localhost:8081/agent")
+# Publish the reply to Flutter while it streams; otherwise only the full
+# text is sent with assistant_response_end
+STREAM_TEXT_TO_FLUTTER = os.getenv("STREAM_TEXT_TO_FLUTTER", "false").lower() == "true"
+
+# Ping interval that keeps the idle TTS websocket (and any NAT/LB state) alive
+TTS_KEEPALIVE_INTERVAL = 20.0
+
+# Sample rate of the Silero VAD model
+VAD_SAMPLE_RATE = 16000
+
+# Max events waiting for the LiveKit data channel
+PUBLISH_QUEUE_SIZE = 256
+
+# Events Flutter can afford to lose, sent on the lossy data channel to avoid
+# head-of-line blocking behind retransmits
+_UNRELIABLE_EVENTS = frozenset({"assistant_text_chunk", "user_speech_start", "user_speech_end"})
+
+# Serialized start of every assistant_text_chunk event
+_TEXT_CHUNK_PREFIX = b'{"type":"assistant_text_chunk","text":'
+
+# Serialized TTS server messages (append_tts wraps orjson.dumps(text))
+_APPEND_TTS_PREFIX = b'{"action":"append_tts","text":'
+_FINISH_TTS_MESSAGE = b'{"action":"finish_tts"}'
+
+# Once the buffer is past the flush target without a natural break, complete
+# words appended within this window go out as one append_tts frame
+TTS_COALESCE_INTERVAL = 0.03
+
+# How long token text is coalesced before one assistant_text_chunk publish
+TEXT_CHUNK_INTERVAL = 0.03
+
+# Buffered TTS text flush sizes (chars). Past the first word nothing is sent
+# below FLUSH_MIN_CHARS; sentence endings flush from there, commas and word
+# breaks only from the target, and FLUSH_HARD_FACTOR x target always flushes
+# the whole buffer (even mid-word, even before the first chunk).
+# Larger chunks give ElevenLabs more context and fewer seams between audio
+# chunks; smaller ones start audio sooner. The target defaults to 120.
+FLUSH_MIN_CHARS = 40
+FLUSH_HARD_FACTOR = 2
+
+# The flush target follows the TTS time-to-first-byte reported by ws_server:
+# fast responses leave headroom for smaller chunks, slow ones get bigger chunks.
+# Past the first word, text without a sentence ending is held until the target
+# (comma/word break or coalescing timer), so the target sets the chunk size.
+TTFB_TARGET_MS = 250
+TTFB_EMA_ALPHA = 0.3
+MIN_FLUSH_TARGET = FLUSH_MIN_CHARS
+MAX_FLUSH_TARGET = 240
+
+# History size (characters) above which older turns are summarized
+HISTORY_CHAR_BUDGET = 8000
+
+# Hard cap on user/assistant exchanges kept in the history, in case
+# summarization fails or falls behind
+MAX_HISTORY_TURNS = 20
+SUMMARY_MODEL = "gpt-4o-mini"
+SUMMARY_PROMPT = """Summarize this conversation in a few sentences.
+Keep every fact the assistant needs to continue it."""
+
+# Characters that end a sentence (incl. Arabic ؟ U+061F and ؞ U+061E) or mark a pause
+_SENTENCE_ENDINGS = frozenset('.!?\u061F\u061E')
+_COMMAS = frozenset(',\u060C')
 
 # System prompt
 SYSTEM_PROMPT = """Talk like a normal Arab human,
 Use the Syrian dialect exclusively. Keep responses concise. Keep answers as short as possible"""
 
 
+# Process-wide VAD/STT instances shared by every agent job in this worker
+_default_vad: Optional[silero.VAD] = None
+_stt_cache: dict[tuple[str, str], lk_openai.STT] = {}
+_tts_session: Optional[aiohttp.ClientSession] = None
+
+
+def get_vad() -> silero.VAD:
+    """Get or load the shared Silero VAD."""
+    global _default_vad
+    if _default_vad is None:
+        # Silero runs its ONNX model on a dedicated executor thread, off the event loop
+        _default_vad = silero.VAD.load(sample_rate=VAD_SAMPLE_RATE, force_cpu=True)
+    return _default_vad
+
+
+def get_stt(model: str, language: str) -> lk_openai.STT:
+    """Get or create the shared STT for a model/language pair."""
+    key = (model, language)
+    if key not in _stt_cache:
+        _stt_cache[key] = lk_openai.STT(model=model, language=language, use_realtime=True)
+    return _stt_cache[key]
+
+
+def get_tts_session() -> aiohttp.ClientSession:
+    """Get or create the shared HTTP session used for TTS websocket connections."""
+    global _tts_session
+    if _tts_session is None or _tts_session.closed:
+        # One pooled connector for every reconnect, with cached DNS lookups
+        _tts_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=0, ttl_dns_cache=300)
+        )
+    return _tts_session
+
+
+async def close_tts_session():
+    """Close the shared TTS session, if one was created."""
+    global _tts_session
+    if _tts_session is not None:
+        await _tts_session.close()
+        _tts_session = None
+
+
 class DirectTTSClient:
     """
     Client that connects to ws_server.py and streams text for TTS.
     Maintains ONE continuous connection per response.
+    
+    append_text/finish_stream must be called from a single task (the agent
+    runs one LLM turn at a time under _llm_lock).
     """
     
-    def __init__(self, ws_url: str, buffer_threshold: int = 50):
+    def __init__(self, ws_url: str, flush_target: int = 120):
         self.ws_url = ws_url
-        self._session: Optional[aiohttp.ClientSession] = None
         self._ws: Optional[aiohttp.ClientWebSocketResponse] = None
         self._connected = False
-        self._lock = asyncio.Lock()
+        self._connecting = False  # Only one task drives ws_connect
+        self._ready = asyncio.Event()  # Set when a connect attempt finishes
+        self._reader_task: Optional[asyncio.Task] = None
         
         # Text buffering to prevent overlapping audio
-        self._buffer = ""
-        self._buffer_threshold = buffer_threshold  # Minimum chars before flushing
+        self._buffer_parts: list[str] = []  # Joined only when flushing
+        self._buffer_len = 0
+        self._flush_target = flush_target  # Flush at the next natural break past this
+        self._base_flush_target = flush_target  # Target at TTFB_TARGET_MS
+        self._ttfb_ema_ms: Optional[float] = None
         self._first_chunk_sent = False
+        self._flush_timer: Optional[asyncio.TimerHandle] = None
+        self._flush_check: Optional[asyncio.Handle] = None  # Once-per-turn predicate pass
+        self._flush_task: Optional[asyncio.Task] = None  # The single in-flight flush
+        
+        # Flush-point state, updated incrementally as text is appended
+        self._last_char = ""  # Last non-whitespace character in the buffer
+        self._last_comma_at = -1  # Buffer index of the last comma
+        self._words_end = 0  # Length of the prefix ending on a word boundary
     
     async def connect(self):
         """Connect to the TTS WebSocket server."""
-        async with self._lock:
-            if self._connected:
-                return
-            
+        if self._connected:
+            return
+        
+        if self._connecting:
+            # Another task is opening the socket; share its outcome
+            await self._ready.wait()
+            if not self._connected:
+                raise ConnectionError("Failed to connect to TTS server")
+            return
+        
+        self._connecting = True
+        self._ready.clear()
+        try:
+            # A socket dropped after a failed send is closed, not leaked
+            await self._close_socket()
+            self._ws = await get_tts_session().ws_connect(
+                self.ws_url,
+                heartbeat=TTS_KEEPALIVE_INTERVAL,
+            )
+            self._connected = True
+            self._reader_task = asyncio.create_task(self._read_messages(self._ws))
+            logger.info(f"Connected to TTS server: {self.ws_url}")
+        except Exception as e:
+            logger.error(f"Failed to connect to TTS server: {e}")
+            raise
+        finally:
+            self._connecting = False
+            self._ready.set()
+    
+    async def _close_socket(self):
+        """Stop the reader and close the current socket, if still open."""
+        if self._reader_task:
+            self._reader_task.cancel()
+            self._reader_task = None
+        if self._ws is not None and not self._ws.closed:
             try:
-                self._session = aiohttp.ClientSession()
-                self._ws = await self._session.ws_connect(self.ws_url)
-                self._connected = True
-                logger.info(f"Connected to TTS server: {self.ws_url}")
+                await self._ws.close()
             except Exception as e:
-                logger.error(f"Failed to connect to TTS server: {e}")
-                raise
+                logger.debug("Closing TTS socket failed: %s", e)
+    
+    async def _read_messages(self, ws: aiohttp.ClientWebSocketResponse):
+        """
+        Keep reading the socket: aiohttp only notices heartbeat PONGs (and
+        server closes) while a receive is pending.
+        """
+        async for msg in ws:
+            if msg.type == aiohttp.WSMsgType.TEXT:
+                try:
+                    data = orjson.loads(msg.data)
+                except orjson.JSONDecodeError:
+                    logger.warning("Invalid message from TTS server: %.100s", msg.data)
+                    continue
+                if data.get("type") == "tts_stats" and data.get("ttfb_ms") is not None:
+                    self._adapt_flush_target(data["ttfb_ms"])
+            elif msg.type == aiohttp.WSMsgType.ERROR:
+                logger.error(f"TTS server connection error: {ws.exception()}")
+                break
+        
+        if ws is self._ws and self._connected:
+            self._connected = False  # Next append_text reconnects
+            logger.warning("TTS server connection closed")
     
-    async def ensure_connected(self):
-        """Ensure connection is established."""
-        if not self._connected:
-            await self.connect()
+    def _adapt_flush_target(self, ttfb_ms: float):
+        """Scale the flush target with the smoothed TTS time-to-first-byte."""
+        if self._ttfb_ema_ms is None:
+            self._ttfb_ema_ms = ttfb_ms
+        else:
+            self._ttfb_ema_ms += TTFB_EMA_ALPHA * (ttfb_ms - self._ttfb_ema_ms)
+        
+        scaled = round(self._base_flush_target * self._ttfb_ema_ms / TTFB_TARGET_MS)
+        self._flush_target = min(max(scaled, MIN_FLUSH_TARGET), MAX_FLUSH_TARGET)
+        logger.info(f"TTS TTFB ~{self._ttfb_ema_ms:.0f}ms, flush target now {self._flush_target}")
     
-    async def append_text(self, text: str):
+    def append_text(self, text: str):
         """
         Buffer text and send in larger chunks to prevent overlapping audio.
         This is the key method - we accumulate tokens and flush at strategic points.
+        Buffering is synchronous; sends run in a background flush task.
         """
-        await self.ensure_connected()
-        
         # Add text to buffer
-        self._buffer += text
-        logger.debug(f"BUFFER: Added '{text}' -> buffer now: '{self._buffer}' (len={len(self._buffer)})")
-        
-        # Determine if we should flush the buffer
-        should_flush = self._should_flush_buffer()
-        
-        if should_flush:
-            logger.info(f"BUFFER: Flushing buffer with {len(self._buffer)} characters")
-            await self._flush_buffer()
+        if not text:
+            return
+        self._scan(text, self._buffer_len)
+        self._buffer_parts.append(text)
+        self._buffer_len += len(text)
+        logger.debug("BUFFER: Added %r (len=%d)", text, self._buffer_len)
+        
+        # Check the flush rules once per event-loop turn, after the whole burst
+        if self._flush_check is None:
+            self._flush_check = asyncio.get_running_loop().call_soon(self._maybe_flush)
+    
+    def _maybe_flush(self):
+        """Decide once, for everything appended this turn, whether to flush now."""
+        self._flush_check = None
+        if self._should_flush_buffer():
+            logger.info("BUFFER: Flushing buffer with %d characters", self._buffer_len)
+            # Punctuation/size flushes send everything so chunks stay
+            # sentence-aligned; only the first-word flush holds a partial word
+            self._schedule_flush(keep_partial_word=not self._break_due())
+        elif self._flush_timer is None and self._buffer_len >= self._flush_target:
+            # Past the target with no break yet: send the complete words that
+            # arrive within the coalescing window instead of waiting for one
+            self._flush_timer = asyncio.get_running_loop().call_later(
+                TTS_COALESCE_INTERVAL, self._on_flush_timer
+            )
         else:
-            logger.debug(f"BUFFER: Not flushing yet, waiting for more content")
+            logger.debug("BUFFER: Not flushing yet, waiting for more content")
+    
+    def _on_flush_timer(self):
+        """Flush the complete words collected during the coalescing window."""
+        self._flush_timer = None
+        self._schedule_flush(keep_partial_word=True)
+    
+    def _schedule_flush(self, keep_partial_word: bool):
+        """Start the flush task unless one is already running."""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._run_flush(keep_partial_word))
+    
+    async def _run_flush(self, keep_partial_word: bool):
+        """
+        Send the buffer, then keep going while text appended during the
+        send is itself due. Send errors are logged by _flush_buffer.
+        """
+        try:
+            if not self._connected:
+                await self.connect()
+            sent = await self._flush_buffer(keep_partial_word=keep_partial_word)
+            # Stop as soon as a pass sends nothing, or this never yields
+            while sent and self._should_flush_buffer():
+                sent = await self._flush_buffer(keep_partial_word=not self._break_due())
+        except Exception:
+            pass  # Already logged; the next flush reconnects
+    
+    def _scan(self, text: str, start: int):
+        """Update the flush-point state for text appended at buffer index start."""
+        for pos, ch in enumerate(text, start):
+            if ch.isspace():
+                if self._last_char:
+                    self._words_end = pos + 1
+            else:
+                self._last_char = ch
+                if ch in _COMMAS:
+                    self._last_comma_at = pos
+    
+    def _reset_buffer(self, remainder: str = ""):
+        """Replace the buffer with remainder and rebuild the flush-point state."""
+        self._buffer_parts = [remainder] if remainder else []
+        self._buffer_len = len(remainder)
+        self._last_char = ""
+        self._last_comma_at = -1
+        self._words_end = 0
+        self._scan(remainder, 0)
     
     def _should_flush_buffer(self) -> bool:
         """
         Determine if buffer should be flushed based on content and length.
         Strategy: Flush on sentence endings or when buffer gets large enough.
         """
-        if not self._buffer:
+        # Until the first chunk goes out, flush every complete word so
+        # ElevenLabs (running in auto_mode) can start generating immediately
+        if not self._first_chunk_sent and self._words_end > 0:
+            return True
+        return self._break_due()
+    
+    def _break_due(self) -> bool:
+        """Whether a sentence, comma or size break calls for sending the whole buffer."""
+        buffer_len = self._buffer_len
+        if buffer_len < FLUSH_MIN_CHARS:
             return False
         
         # Always flush if buffer gets very large (safety)
-        if len(self._buffer) >= self._buffer_threshold * 2:
+        if buffer_len >= self._flush_target * FLUSH_HARD_FACTOR:
             return True
         
         # Flush on strong punctuation (sentence endings)
-        if len(self._buffer) >= 10:  # Minimum buffer before checking punctuation
-            # Check for sentence endings
-            if self._buffer.rstrip().endswith(('.', '!', '?', '\u061F', '\u061E')):
-                return True
-            
-            # For Arabic question marks and other punctuation
-            # ؟ is Arabic question mark (U+061F)
-            # ؞ is Arabic triple dot punctuation (U+061E)
-        
-        # Flush when buffer reaches threshold AND we hit a natural break
-        if len(self._buffer) >= self._buffer_threshold:
-            # Look for natural break points near the end
-            recent_text = self._buffer[-20:] if len(self._buffer) > 20 else self._buffer
-            
-            # Flush on commas only if we have enough text
-            if ',' in recent_text or '،' in recent_text:  # Arabic comma ،
+        if self._last_char in _SENTENCE_ENDINGS:
+            return True
+        
+        # Flush when buffer reaches the target AND we hit a natural break
+        if buffer_len >= self._flush_target:
+            # Flush on a comma (incl. Arabic ، U+060C) within the last 20 chars
+            if self._last_comma_at >= buffer_len - 20:
                 return True
             
             # Flush on space after reaching threshold (word boundary)
-            if self._buffer.endswith(' '):
+            if self._buffer_parts[-1].endswith(' '):
                 return True
         
         return False
     
-    async def _flush_buffer(self):
+    async def _flush_buffer(self, keep_partial_word: bool = False) -> bool:
         """
         Send the current buffer to TTS server with proper formatting.
+        With keep_partial_word, only complete words are sent and the trailing
+        partial word stays buffered (nothing is sent until a word completes),
+        unless the buffer has reached the hard limit. Returns whether anything
+        was sent.
         """
-        if not self._buffer.strip():
-            return
+        if self._flush_timer:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        
+        if not self._last_char:
+            return False  # Only whitespace buffered
+        
+        split_at = self._buffer_len
+        if keep_partial_word and split_at < self._flush_target * FLUSH_HARD_FACTOR:
+            split_at = self._words_end
+            if not split_at:
+                return False
+        buffered = "".join(self._buffer_parts)
+        text_to_send = buffered[:split_at]
+        self._reset_buffer(buffered[split_at:])
         
         # Ensure text ends with space as per ElevenLabs docs
-        text_to_send = self._buffer
         if not text_to_send.endswith(' '):
             text_to_send += ' '
         
         try:
-            await self._ws.send_json({
-                "action": "append_tts",
-                "text": text_to_send
-            })
-            logger.debug(f"Flushed TTS buffer ({len(text_to_send)} chars): {text_to_send[:50]}...")
+            await self._ws.send_bytes(_APPEND_TTS_PREFIX + orjson.dumps(text_to_send) + b"}")
+            logger.debug("Flushed TTS buffer (%d chars): %.50s...", len(text_to_send), text_to_send)
             
-            # Clear buffer and mark first chunk sent
-            self._buffer = ""
+            # Mark first chunk sent (the buffer was taken before sending, so
+            # text appended meanwhile is kept)
             self._first_chunk_sent = True
+            return True
             
         except Exception as e:
             logger.error(f"Failed to flush buffer: {e}")
             self._connected = False
+            # Put the text back in front of anything appended meanwhile so
+            # the next flush (after reconnecting) still sends it
+            self._reset_buffer(buffered[:split_at] + "".join(self._buffer_parts))
             raise
     
     async def finish_stream(self):
         """Signal that the LLM response is complete - ElevenLabs should finish generating."""
-        if not self._connected or not self._ws:
-            return
+        if self._flush_check is not None:
+            self._flush_check.cancel()  # The final flush below covers it
+            self._flush_check = None
+        if self._flush_task is not None:
+            await self._flush_task
+            self._flush_task = None
         
         try:
+            if not self._connected:
+                await self.connect()
+            
             # Flush any remaining buffer first
-            if self._buffer.strip():
+            if self._last_char:
                 await self._flush_buffer()
             
             # Then send finish signal
-            await self._ws.send_json({
-                "action": "finish_tts"
-            })
+            await self._ws.send_bytes(_FINISH_TTS_MESSAGE)
             logger.info("Sent finish_tts signal")
             
-            # Reset buffer state for next response
-            self._buffer = ""
-            self._first_chunk_sent = False
-            
         except Exception as e:
             logger.error(f"Failed to send finish signal: {e}")
+            self._connected = False  # Next response reconnects
+        
+        finally:
+            # Reset buffer state for next response, even if this one failed
+            self._reset_buffer()
+            self._first_chunk_sent = False
     
     async def disconnect(self):
         """Disconnect from the TTS server."""
-        async with self._lock:
-            if self._ws:
-                await self._ws.close()
-            if self._session:
-                await self._session.close()
-            self._connected = False
-            logger.info("Disconnected from TTS server")
+        self._connected = False
+        await self._close_socket()
+        logger.info("Disconnected from TTS server")
 
 
 class DirectStreamingAgent:
@@ -216,23 +491,41 @@ class DirectStreamingAgent:
     5. Flutter receives audio + alignment data for highlighting
     """
     
-    def __init__(self, room: rtc.Room, buffer_threshold: int = 80):
+    def __init__(self, room: rtc.Room, flush_target: int = 120):
         self.room = room
-        self.openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY)
-        self.tts_client = DirectTTSClient(TTS_WS_URL, buffer_threshold=buffer_threshold)
+        # One pooled HTTP/2 connection to OpenAI, reused across turns
+        self.openai_client = AsyncOpenAI(
+            api_key=OPENAI_API_KEY,
+            http_client=httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=4, keepalive_expiry=600),
+                timeout=httpx.Timeout(30.0, connect=5.0),
+            ),
+        )
+        self.tts_client = DirectTTSClient(TTS_WS_URL, flush_target=flush_target)
         self.conversation_history: list[dict] = [
             {"role": "system", "content": SYSTEM_PROMPT}
         ]
         
-        # VAD and STT
-        self.vad = silero.VAD.load()
-        self.stt = lk_openai.STT(model="gpt-4o-transcribe", language='ar')
+        # VAD and STT (loaded once per worker process)
+        self.vad = get_vad()
+        self.stt = get_stt("gpt-4o-transcribe", "ar")
         
         # Track current state
-        self._is_processing = False
-        self._processing_lock = asyncio.Lock()
+        self._llm_lock = asyncio.Lock()  # Guards conversation_history and LLM turns
         self._tracked_sids = set()
         
+        # Events waiting for the data channel, sent by _send_published_events
+        self._publish_queue: asyncio.Queue[tuple[str, bytes]] = asyncio.Queue(maxsize=PUBLISH_QUEUE_SIZE)
+        self._publish_task: Optional[asyncio.Task] = None
+        
+        # LLM tokens waiting to be published to Flutter as one text chunk
+        self._text_chunk_queue: asyncio.Queue[str] = asyncio.Queue()
+        self._text_chunk_task: Optional[asyncio.Task] = None
+        
+        # Background summarization of older conversation turns
+        self._summary_task: Optional[asyncio.Task] = None
+        
         logger.info("DirectStreamingAgent initialized")
     
     async def start(self):
@@ -242,6 +535,11 @@ class DirectStreamingAgent:
         # Connect to TTS server
         await self.tts_client.connect()
         
+        # Start publishing events and coalescing text chunks for Flutter
+        self._publish_task = asyncio.create_task(self._send_published_events())
+        if STREAM_TEXT_TO_FLUTTER:
+            self._text_chunk_task = asyncio.create_task(self._publish_text_chunks())
+        
         # Set up track subscription handler
         @self.room.on("track_subscribed")
         def on_track_subscribed(
@@ -250,84 +548,126 @@ class DirectStreamingAgent:
             participant: rtc.RemoteParticipant,
         ):
             if track.kind == rtc.TrackKind.KIND_AUDIO:
-                if track.sid in self._tracked_sids:
+                if not self._claim_track(track.sid):
                     logger.warning(f"Track {track.sid} already tracked, skipping")
                     return
                 
                 logger.info(f"Subscribed to audio track from {participant.identity}")
-                self._tracked_sids.add(track.sid)
                 asyncio.create_task(self._process_audio_track(track))
         
         # Check for existing tracks
         for participant in self.room.remote_participants.values():
             for publication in participant.track_publications.values():
                 if publication.track and publication.track.kind == rtc.TrackKind.KIND_AUDIO:
-                    if publication.track.sid in self._tracked_sids:
+                    if not self._claim_track(publication.track.sid):
                         continue
                         
                     logger.info(f"Found existing audio track from {participant.identity}")
-                    self._tracked_sids.add(publication.track.sid)
                     asyncio.create_task(self._process_audio_track(publication.track))
         
         logger.info("DirectStreamingAgent started and listening")
     
+    def _claim_track(self, sid: str) -> bool:
+        """
+        Mark a track as tracked. Returns False if it already was.
+        Both callers run on the event loop and nothing awaits between the
+        check and the add, so no other callback can claim the sid in between.
+        """
+        if sid in self._tracked_sids:
+            return False
+        self._tracked_sids.add(sid)
+        return True
+    
     async def _process_audio_track(self, track: rtc.Track):
         """Process incoming audio track with VAD and STT."""
         logger.info("Starting audio track processing")
         
-        audio_stream = rtc.AudioStream(track)
+        # Receive mono frames at Silero's native rate so the VAD skips resampling
+        audio_stream = rtc.AudioStream(track, sample_rate=VAD_SAMPLE_RATE, num_channels=1)
         vad_stream = self.vad.stream()
         
+        # Streaming STT transcribes while the user is still talking
+        stt_stream = self.stt.stream() if self.stt.capabilities.streaming else None
+        
         async def feed_vad():
-            """Feed audio frames to VAD."""
+            """Feed audio frames to VAD (and streaming STT)."""
             async for event in audio_stream:
                 if event.frame:
                     vad_stream.push_frame(event.frame)
+                    if stt_stream:
+                        stt_stream.push_frame(event.frame)
         
         # Start feeding VAD
         feed_task = asyncio.create_task(feed_vad())
+        stt_task = asyncio.create_task(self._process_stt_stream(stt_stream)) if stt_stream else None
         
         try:
             # Process VAD events
             async for event in vad_stream:
                 if event.type == VADEventType.START_OF_SPEECH:
                     logger.info("Speech started")
-                    await self._publish_event("user_speech_start", {})
+                    self._publish_event("user_speech_start", {})
                     
                 elif event.type == VADEventType.END_OF_SPEECH:
                     logger.info("Speech ended, transcribing...")
-                    await self._publish_event("user_speech_end", {})
+                    self._publish_event("user_speech_end", {})
                     
-                    # Transcribe the speech - event.frames contains the audio
-                    if event.frames:
-                        await self._transcribe_and_respond(event.frames)
+                    # Without streaming STT, transcribe the buffered speech
+                    if not stt_stream and event.frames:
+                        asyncio.create_task(self._transcribe_and_respond(event.frames))
         
         except Exception as e:
             logger.error(f"Error in audio processing: {e}", exc_info=True)
         finally:
             feed_task.cancel()
+            if stt_task:
+                stt_task.cancel()
+                await stt_stream.aclose()
             await vad_stream.aclose()
     
-    async def _transcribe_and_respond(self, frames: list[rtc.AudioFrame]):
-        """Transcribe audio frames and generate response."""
-        async with self._processing_lock:
-            if self._is_processing:
-                logger.warning("Already processing, skipping")
-                return
-            self._is_processing = True
+    async def _process_stt_stream(self, stt_stream: stt.SpeechStream):
+        """Forward interim transcripts and respond to final ones."""
+        try:
+            async for event in stt_stream:
+                if not event.alternatives:
+                    continue
+                
+                text = event.alternatives[0].text
+                if event.type == stt.SpeechEventType.INTERIM_TRANSCRIPT and text.strip():
+                    self._publish_event("user_transcript", {
+                        "text": text,
+                        "is_final": False
+                    })
+                
+                elif event.type == stt.SpeechEventType.FINAL_TRANSCRIPT:
+                    asyncio.create_task(self._transcribe_and_respond(transcript=text))
         
+        except Exception as e:
+            logger.error(f"Error in STT stream: {e}", exc_info=True)
+    
+    async def _transcribe_and_respond(
+        self,
+        frames: Optional[list[rtc.AudioFrame]] = None,
+        transcript: Optional[str] = None,
+    ):
+        """
+        Transcribe audio frames (unless already transcribed) and generate response.
+        STT runs freely; only the LLM turn is serialized by _llm_lock, so the
+        next utterance is transcribed while the current response is streaming.
+        """
         try:
-            # Combine frames into one buffer
-            combined_frame = self._combine_frames(frames)
-            
-            # Transcribe with STT
-            logger.info("Starting transcription...")
-            
-            result = await self.stt.recognize(buffer=combined_frame)
-            
-            transcript = ""
-            if result.alternatives:
-                transcript = result.alternatives[0].text
+            if transcript is None:
+                # Combine frames into one buffer
+                combined_frame = self._combine_frames(frames)
+                
+                # Transcribe with STT
+                logger.info("Starting transcription...")
+                
+                result = await self.stt.recognize(buffer=combined_frame)
+                
+                transcript = ""
+                if result.alternatives:
+                    transcript = result.alternatives[0].text
             
             if not transcript.strip():
                 logger.info("Empty transcription, skipping")
@@ -336,24 +676,23 @@ class DirectStreamingAgent:
             logger.info(f"User said: {transcript}")
             
             # Send transcript to Flutter
-            await self._publish_event("user_transcript", {
+            self._publish_event("user_transcript", {
                 "text": transcript,
                 "is_final": True
             })
             
-            # Add to conversation history
-            self.conversation_history.append({
-                "role": "user",
-                "content": transcript
-            })
-            
-            # Generate and stream response
-            await self._stream_llm_response()
+            async with self._llm_lock:
+                # Add to conversation history
+                self.conversation_history.append({
+                    "role": "user",
+                    "content": transcript
+                })
+                
+                # Generate and stream response
+                await self._stream_llm_response()
         
         except Exception as e:
             logger.error(f"Error in transcribe_and_respond: {e}", exc_info=True)
-        finally:
-            self._is_processing = False
     
     def _combine_frames(self, frames: list[rtc.AudioFrame]) -> rtc.AudioFrame:
         """Combine multiple audio frames into one."""
@@ -367,8 +706,15 @@ class DirectStreamingAgent:
         sample_rate = frames[0].sample_rate
         num_channels = frames[0].num_channels
         
-        all_data = b''.join(f.data.tobytes() if hasattr(f.data, 'tobytes') else bytes(f.data) for f in frames)
+        # Copy each frame once into a preallocated int16 buffer
+        arrays = [np.frombuffer(f.data, dtype=np.int16) for f in frames]
         total_samples = sum(f.samples_per_channel for f in frames)
+        all_data = bytearray(sum(a.nbytes for a in arrays))
+        merged = np.frombuffer(all_data, dtype=np.int16)
+        offset = 0
+        for array in arrays:
+            merged[offset:offset + array.size] = array
+            offset += array.size
         
         return rtc.AudioFrame(
             data=all_data,
@@ -385,76 +731,192 @@ class DirectStreamingAgent:
         """
         logger.info("Starting LLM response streaming")
         
-        full_response = ""
+        response_parts: list[str] = []
         
         try:
             # Notify Flutter that assistant is responding
-            await self._publish_event("assistant_response_start", {})
-            
-            # Start OpenAI streaming
-            stream = await self.openai_client.chat.completions.create(
-                model="gpt-4.1",
-                messages=self.conversation_history,
-                stream=True,
-                temperature=0.7,
-            )
+            self._publish_event("assistant_response_start", {})
             
             # Process stream - send EACH token to TTS immediately
-            async for chunk in stream:
-                if chunk.choices and chunk.choices[0].delta.content:
-                    token = chunk.choices[0].delta.content
-                    full_response += token
-                    
-                    # Send token to TTS server - builds ONE continuous stream
-                    await self.tts_client.append_text(token)
-                    
-                    # Also send to Flutter for display (text highlighting)
-                    await self._publish_event("assistant_text_chunk", {"text": token})
-                    
-                    logger.debug(f"Streamed token: {token}")
+            async for token in self._stream_llm_tokens():
+                response_parts.append(token)
+                
+                # Send token to TTS server - builds ONE continuous stream
+                self.tts_client.append_text(token)
+                
+                # Also send to Flutter for display (coalesced by _publish_text_chunks)
+                if STREAM_TEXT_TO_FLUTTER:
+                    self._text_chunk_queue.put_nowait(token)
+                
+                logger.debug("Streamed token: %s", token)
             
             logger.info("LLM stream finished, sending finish_tts")
             
+            full_response = "".join(response_parts)
+            
             # Signal end of LLM response - TTS server will close ElevenLabs stream
             await self.tts_client.finish_stream()
             
+            # Make sure every text chunk reached Flutter before the end marker
+            await self._text_chunk_queue.join()
+            
             # Notify Flutter that response is complete
-            await self._publish_event("assistant_response_end", {
+            self._publish_event("assistant_response_end", {
                 "full_text": full_response
             })
             
-            # Add to conversation history
-            self.conversation_history.append({
-                "role": "assistant",
-                "content": full_response
-            })
+            # Add to conversation history (an empty reply would only confuse the next turn)
+            if full_response:
+                self.conversation_history.append({
+                    "role": "assistant",
+                    "content": full_response
+                })
+                self._trim_history()
+                self._maybe_summarize_history()
             
             logger.info(f"LLM response complete: {full_response[:100]}...")
         
         except Exception as e:
             logger.error(f"Error streaming LLM response: {e}", exc_info=True)
-            await self._publish_event("error", {"message": str(e)})
+            self._publish_event("error", {"message": str(e)})
+    
+    async def _stream_llm_tokens(self):
+        """
+        Stream the reply to the current history from the chat completions API.
+        Goes through the SDK so 429/5xx retries and in-stream errors are handled.
+        """
+        stream = await self.openai_client.chat.completions.create(
+            model="gpt-4.1",
+            messages=self.conversation_history,
+            stream=True,
+            stream_options={"include_usage": False},
+            temperature=0.7,
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
+    def _trim_history(self):
+        """Drop the oldest exchanges beyond MAX_HISTORY_TURNS."""
+        if self._summary_task is not None:
+            return  # The running summary replaces a slice by position
+        
+        history = self.conversation_history
+        # Keep the system prompt and the summary message that follows it, if any
+        head = 2 if len(history) > 1 and history[1]["role"] == "system" else 1
+        excess = len(history) - head - 2 * MAX_HISTORY_TURNS
+        if excess > 0:
+            del history[head:head + excess]
+            logger.info(f"Trimmed {excess} old messages from the conversation history")
     
-    async def _publish_event(self, event_type: str, data: dict):
-        """Publish an event to Flutter via LiveKit data channel."""
+    def _maybe_summarize_history(self):
+        """Start a background summary once the history outgrows its budget."""
+        if self._summary_task is not None:
+            return
+        
+        history_chars = sum(len(m["content"]) for m in self.conversation_history)
+        if history_chars > HISTORY_CHAR_BUDGET:
+            logger.info(f"History is {history_chars} chars, summarizing older turns")
+            self._summary_task = asyncio.create_task(self._summarize_history())
+    
+    async def _summarize_history(self):
+        """Replace older turns with a short summary to keep the prompt small."""
         try:
-            payload = json.dumps({
-                "type": event_type,
-                **data
-            }).encode('utf-8')
+            # Keep the system prompt and the latest exchange verbatim
+            old_turns = self.conversation_history[1:-2]
+            if not old_turns:
+                return
             
-            await self.room.local_participant.publish_data(
-                payload=payload,
-                reliable=True
+            transcript = "\n".join(f"{m['role']}: {m['content']}" for m in old_turns)
+            response = await self.openai_client.chat.completions.create(
+                model=SUMMARY_MODEL,
+                messages=[
+                    {"role": "system", "content": SUMMARY_PROMPT},
+                    {"role": "user", "content": transcript},
+                ],
+                temperature=0.3,
             )
-            logger.debug(f"Published event: {event_type}")
+            summary = response.choices[0].message.content or ""
+            
+            # Turns are only appended meanwhile, so the summarized slice is unchanged
+            self.conversation_history[1:1 + len(old_turns)] = [{
+                "role": "system",
+                "content": f"Summary of the earlier conversation: {summary}"
+            }]
+            logger.info(f"Summarized {len(old_turns)} turns into {len(summary)} chars")
+        
+        except Exception as e:
+            logger.error(f"Failed to summarize history: {e}", exc_info=True)
+        finally:
+            self._summary_task = None
+    
+    async def _publish_text_chunks(self):
+        """Publish queued LLM tokens as one assistant_text_chunk per interval."""
+        queue = self._text_chunk_queue
+        while True:
+            parts = [await queue.get()]
+            await asyncio.sleep(TEXT_CHUNK_INTERVAL)
+            while not queue.empty():
+                parts.append(queue.get_nowait())
+            
+            self._publish_text_chunk("".join(parts))
+            for _ in parts:
+                queue.task_done()
+    
+    def _publish_event(self, event_type: str, data: dict):
+        """Queue an event for Flutter without waiting on the data channel."""
+        try:
+            payload = orjson.dumps({
+                "type": event_type,
+                **data
+            })
         except Exception as e:
             logger.error(f"Failed to publish event: {e}")
+            return
+        
+        self._queue_payload(event_type, payload)
+    
+    def _publish_text_chunk(self, text: str):
+        """Queue an assistant_text_chunk, only encoding the text itself."""
+        self._queue_payload("assistant_text_chunk", _TEXT_CHUNK_PREFIX + orjson.dumps(text) + b"}")
+    
+    def _queue_payload(self, event_type: str, payload: bytes):
+        """Hand a serialized event to _send_published_events."""
+        pending = self._publish_queue
+        
+        # Text chunks only feed the display, drop them first under backpressure
+        if event_type == "assistant_text_chunk" and pending.qsize() >= pending.maxsize * 3 // 4:
+            logger.warning("Publish queue backed up, dropping text chunk")
+            return
+        
+        try:
+            pending.put_nowait((event_type, payload))
+        except asyncio.QueueFull:
+            logger.warning(f"Publish queue full, dropping event: {event_type}")
+    
+    async def _send_published_events(self):
+        """Send queued events to Flutter via LiveKit data channel, in order."""
+        while True:
+            event_type, payload = await self._publish_queue.get()
+            try:
+                await self.room.local_participant.publish_data(
+                    payload=payload,
+                    reliable=event_type not in _UNRELIABLE_EVENTS
+                )
+                logger.debug("Published event: %s", event_type)
+            except Exception as e:
+                logger.error(f"Failed to publish event: {e}")
     
     async def stop(self):
         """Stop the agent and clean up."""
         logger.info("Stopping DirectStreamingAgent")
+        for task in (self._text_chunk_task, self._publish_task):
+            if task:
+                task.cancel()
+        self._text_chunk_task = None
+        self._publish_task = None
         await self.tts_client.disconnect()
+        await self.openai_client.close()
 
 
 async def entrypoint(ctx: agents.JobContext):
@@ -481,6 +943,7 @@ async def entrypoint(ctx: agents.JobContext):
         
         # Cleanup
         await agent.stop()
+        await close_tts_session()
         logger.info("Agent stopped")
         
     except Exception as e:
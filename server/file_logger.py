@@ -9,7 +9,7 @@ import json
 import os
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Sequence
 import logging
 
 logger = logging.getLogger(__name__)
@@ -31,9 +31,9 @@ class AlignmentLogger:
     def save_alignment(
         self,
         text: str,
-        chars: list[str],
-        times: list[int],
-        durations: Optional[list[int]] = None,
+        chars: Sequence[str],
+        times: Sequence[int],
+        durations: Optional[Sequence[int]] = None,
     ) -> str:
         """
         Save alignment data to JSON file.
@@ -0,0 +1,85 @@
+"""DirectTTSClient buffering against a stub TTS socket."""
+
+import asyncio
+import threading
+
+import orjson
+import pytest
+
+agent_direct = pytest.importorskip("agent_direct")
+
+
+class StubWebSocket:
+    """Records the append_tts texts the client sends."""
+    
+    def __init__(self):
+        self.texts: list[str] = []
+    
+    async def send_bytes(self, data: bytes):
+        self.texts.append(orjson.loads(data).get("text"))
+        await asyncio.sleep(0)
+
+
+def run_bounded(coro_fn, timeout: float = 5.0):
+    """Run coro_fn() on its own event loop and fail if that loop never finishes."""
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(value=asyncio.run(coro_fn())), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "event loop hung"
+    return result["value"]
+
+
+async def stream(tokens: list[str], flush_target: int = 120) -> list[str]:
+    client = agent_direct.DirectTTSClient("ws://stub", flush_target=flush_target)
+    client._ws = StubWebSocket()
+    client._connected = True
+    for token in tokens:
+        client.append_text(token)
+        await asyncio.sleep(0.01)
+    await client.finish_stream()
+    return client._ws.texts
+
+
+@pytest.mark.parametrize("tokens", [
+    ["https://example.com/a/really/long/path/index."],
+    ["x" * 300],
+])
+def test_first_chunk_without_whitespace_is_sent(tokens):
+    texts = run_bounded(lambda: stream(tokens))
+    assert texts[0] == tokens[0] + " "
+    assert texts[-1] is None  # finish_tts
+
+
+def test_sentence_flush_sends_whole_buffer():
+    tokens = ["Hello", " world,", " this", " is", " a", " test", " of", " the", " buffering", " system.", " Next"]
+    texts = run_bounded(lambda: stream(tokens))
+    assert texts[:2] == ["Hello ", "world, this is a test of the buffering system. "]
+
+
+def test_hard_limit_flushes_partial_word():
+    async def flush_timer_pass():
+        client = agent_direct.DirectTTSClient("ws://stub", flush_target=40)
+        client._ws = StubWebSocket()
+        client._connected = True
+        client.append_text("y" * 80)
+        sent = await client._flush_buffer(keep_partial_word=True)
+        return sent, client._ws.texts, client._buffer_len
+    
+    assert run_bounded(flush_timer_pass) == (True, ["y" * 80 + " "], 0)
+
+
+def test_failed_finish_resets_buffer():
+    class FailingWebSocket(StubWebSocket):
+        async def send_bytes(self, data: bytes):
+            raise ConnectionResetError("gone")
+    
+    async def failed_finish():
+        client = agent_direct.DirectTTSClient("ws://stub")
+        client._ws = FailingWebSocket()
+        client._connected = True
+        client.append_text("Half a sentence")
+        await client.finish_stream()
+        return client._connected, client._buffer_len, client._first_chunk_sent
+    
+    assert run_bounded(failed_finish) == (False, 0, False)
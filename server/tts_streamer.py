@@ -6,30 +6,100 @@ audio chunks with character-level timestamps.
 """
 
 import asyncio
-import base64
-import json
+import binascii
 import os
+import time
 from dataclasses import dataclass
-from typing import AsyncGenerator, Optional
+from typing import AsyncGenerator, Callable, Optional, Sequence
 import aiohttp
+import orjson
+from yarl import URL
 from dotenv import load_dotenv
 import logging
 
 load_dotenv()
 
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+# ElevenLabs takes JSON in text frames; an empty text ends the input
+_END_OF_INPUT = '{"text":""}'
+
+# Re-trigger generation when this many chars were sent since the last trigger
+# and no audio has arrived for RETRIGGER_AFTER_S
+RETRIGGER_MIN_CHARS = 80
+RETRIGGER_AFTER_S = 0.25
+
+_http_session: Optional[aiohttp.ClientSession] = None
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    """Get or create the HTTP session shared by all ElevenLabs connections."""
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        _http_session = aiohttp.ClientSession()
+    return _http_session
+
+
+async def close_http_session():
+    """Close the shared HTTP session, if one was created."""
+    global _http_session
+    if _http_session is not None:
+        await _http_session.close()
+        _http_session = None
+
+
+def _is_status_frame(raw: str) -> bool:
+    """True for frames without audio, final marker or error (skips the JSON parse)."""
+    return '"audio"' not in raw and '"isFinal"' not in raw and '"error"' not in raw
+
+
+# Shared empty result for missing or null alignment fields (no list per chunk)
+_EMPTY: tuple = ()
+
+
+def _camel_extractor(alignment: dict) -> tuple:
+    """Read (times, durations, chars) from a camelCase alignment."""
+    return (
+        alignment.get("charStartTimesMs") or _EMPTY,
+        alignment.get("charDurationsMs") or _EMPTY,
+        alignment.get("chars") or _EMPTY,
+    )
+
+
+def _snake_extractor(alignment: dict) -> tuple:
+    """Read (times, durations, chars) from a snake_case alignment."""
+    return (
+        alignment.get("char_start_times_ms") or _EMPTY,
+        alignment.get("char_durations_ms") or _EMPTY,
+        alignment.get("chars") or _EMPTY,
+    )
+
+
+def _detect_extractor(alignment: dict) -> Callable[[dict], tuple]:
+    """Pick the extractor matching the casing of an alignment payload."""
+    return _camel_extractor if "charStartTimesMs" in alignment else _snake_extractor
+
+
+def _stream_input_url(base_url: str, config: "StreamConfig") -> URL:
+    """Build the stream-input URL for a config, with encoded path and query."""
+    query = {
+        "model_id": config.model_id,
+        "output_format": config.output_format,
+        "sync_alignment": "true",  # Enable character-level timing
+    }
+    if config.auto_mode:
+        query["auto_mode"] = "true"
+    return (URL(base_url) / config.voice_id / "stream-input").with_query(query)
+
 
 @dataclass
 class AudioChunk:
     """Represents a single audio chunk with timing data."""
     audio_bytes: bytes
     char_start_times_ms: list[int]  # Absolute times from utterance start
-    char_durations_ms: list[int]
-    chars: list[str]
+    char_durations_ms: Sequence[int]
+    chars: Sequence[str]
     chunk_index: int
-    is_final: bool = False
 
 
 @dataclass
@@ -37,12 +107,21 @@ class StreamConfig:
     """Configuration for TTS streaming."""
     voice_id: str
     model_id: str = "eleven_flash_v2_5"  # Low-latency model
-    optimize_streaming_latency: int = 4  # 0-4, higher = faster (4 for lowest latency)
     stability: float = 0.5
     similarity_boost: float = 0.75
     output_format: str = "pcm_22050"  # Raw PCM at 22050 Hz
     language_code: str = "ar"  # Arabic language code
     chunk_length_schedule: list[int] = None  # Will use [50, 150, 300, 300] by default
+    auto_mode: bool = False  # Let ElevenLabs decide chunking (ignores chunk_length_schedule)
+    
+    def __post_init__(self):
+        if self.chunk_length_schedule is None:
+            self.chunk_length_schedule = [50, 150, 300, 300]
+    
+    @property
+    def sample_rate(self) -> int:
+        """Sample rate encoded in output_format (e.g. pcm_22050 -> 22050)."""
+        return int(self.output_format.split("_")[1])
 
 
 class ElevenLabsStreamer:
@@ -62,16 +141,11 @@ class ElevenLabsStreamer:
         self.api_key = os.getenv("ELEVEN_API_KEY")
         if not self.api_key:
             raise ValueError("ELEVEN_API_KEY not set in environment")
+        self._ws_url = self._build_ws_url()
     
-    def _build_ws_url(self) -> str:
+    def _build_ws_url(self) -> URL:
         """Construct the WebSocket URL with query parameters."""
-        return (
-            f"{self.BASE_URL}/{self.config.voice_id}/stream-input"
-            f"?model_id={self.config.model_id}"
-            f"&output_format={self.config.output_format}"
-            f"&optimize_streaming_latency={self.config.optimize_streaming_latency}"
-            f"&sync_alignment=true"  # Enable character-level timing
-        )
+        return _stream_input_url(self.BASE_URL, self.config)
     
     async def stream_text(self, text: str) -> AsyncGenerator[AudioChunk, None]:
         """
@@ -83,118 +157,119 @@ class ElevenLabsStreamer:
         - char_durations_ms: Duration of each character
         - chars: The characters in this chunk
         """
-        url = self._build_ws_url()
-        offset_ms = 0  # Tracks cumulative audio duration
+        url = self._ws_url
+        sample_rate = self.config.sample_rate
+        offset_samples = 0  # Tracks cumulative audio duration (exact, no rounding drift)
         chunk_index = 0
+        extract_alignment: Optional[Callable[[dict], tuple]] = None
         
         logger.info(f"Connecting to ElevenLabs WebSocket: {url}")
         
         try:
-            # Use aiohttp for WebSocket connection (handles headers properly)
-            async with aiohttp.ClientSession() as session:
-                async with session.ws_connect(
-                    url,
-                    headers={"xi-api-key": self.api_key}
-                ) as ws:
-                    # Send initial message with text and settings
-                    init_message = {
-                        "text": text,
-                        "voice_settings": {
-                            "stability": self.config.stability,
-                            "similarity_boost": self.config.similarity_boost,
-                        },
-                        "generation_config": {
-                            "chunk_length_schedule": [120, 160, 250, 290],
-                        },
-                        "xi_api_key": self.api_key,
-                        "try_trigger_generation": True,
-                    }
-                    
-                    logger.debug(f"Sending init message: {json.dumps(init_message)[:200]}...")
-                    await ws.send_json(init_message)
-                    
-                    # Send end-of-input signal
-                    await ws.send_json({"text": ""})
-                    logger.debug("Sent end-of-input signal")
-                    
-                    # Receive streaming chunks
-                    async for msg in ws:
-                        if msg.type == aiohttp.WSMsgType.TEXT:
-                            try:
-                                data = json.loads(msg.data)
-                            except json.JSONDecodeError:
-                                logger.warning(f"Failed to decode JSON: {msg.data[:100]}")
-                                continue
-                            
-                            # Check for errors
-                            if "error" in data:
-                                logger.error(f"ElevenLabs error: {data['error']}")
-                                raise Exception(f"ElevenLabs API error: {data['error']}")
-                            
-                            audio_b64 = data.get("audio")
-                            is_final = data.get("isFinal", False)
-                            
-                            if is_final:
-                                logger.info("Received final chunk marker")
-                                break
-                            
-                            if not audio_b64:
-                                # Could be a status message, continue
-                                logger.debug(f"Non-audio message: {str(data)[:100]}")
-                                continue
-                            
-                            # Decode audio
-                            audio_bytes = base64.b64decode(audio_b64)
-                            
-                            # Extract alignment data
-                            # ElevenLabs provides normalizedAlignment with character timings
-                            alignment = data.get("normalizedAlignment") or data.get("alignment") or {}
-                            if alignment is None:
-                                alignment = {}
-                            chunk_char_times = alignment.get("charStartTimesMs") or alignment.get("char_start_times_ms") or []
-                            chunk_char_durations = alignment.get("charDurationsMs") or alignment.get("char_durations_ms") or []
-                            chunk_chars = alignment.get("chars") or []
-                            
-                            # Convert to absolute times (add offset)
-                            absolute_times = [t + offset_ms for t in chunk_char_times]
-                            
-                            # Calculate chunk duration for next offset
-                            # Based on audio bytes: PCM 16-bit mono at 22050 Hz
-                            # bytes / (2 bytes per sample * 22050 samples/sec) * 1000 ms/sec
-                            audio_duration_ms = int(len(audio_bytes) / (2 * 22050) * 1000)
-                            offset_ms += audio_duration_ms
-                            
-                            logger.debug(
-                                f"Chunk {chunk_index}: {len(audio_bytes)} bytes, "
-                                f"{len(chunk_chars)} chars, duration: {audio_duration_ms}ms"
-                            )
-                            
-                            yield AudioChunk(
-                                audio_bytes=audio_bytes,
-                                char_start_times_ms=absolute_times,
-                                char_durations_ms=chunk_char_durations,
-                                chars=chunk_chars,
-                                chunk_index=chunk_index,
-                            )
-                            chunk_index += 1
-                        elif msg.type == aiohttp.WSMsgType.ERROR:
-                            logger.error(f"WebSocket error: {ws.exception()}")
-                            break
-                        elif msg.type == aiohttp.WSMsgType.CLOSED:
-                            logger.info("WebSocket closed by server")
+            # Shared session: the connection pool and TLS state stay warm across streams
+            async with get_http_session().ws_connect(
+                url,
+                headers={"xi-api-key": self.api_key}
+            ) as ws:
+                # Send initial message with text and settings
+                init_message = {
+                    "text": text,
+                    "voice_settings": {
+                        "stability": self.config.stability,
+                        "similarity_boost": self.config.similarity_boost,
+                    },
+                    "generation_config": {
+                        "chunk_length_schedule": [120, 160, 250, 290],
+                    },
+                    "xi_api_key": self.api_key,
+                    "try_trigger_generation": True,
+                }
+                
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Sending init message: %.200s...", orjson.dumps(init_message).decode())
+                await ws.send_str(orjson.dumps(init_message).decode())
+                
+                # Send end-of-input signal
+                await ws.send_str(_END_OF_INPUT)
+                logger.debug("Sent end-of-input signal")
+                
+                # Receive streaming chunks
+                text_type = aiohttp.WSMsgType.TEXT
+                decode_audio = binascii.a2b_base64
+                async for msg in ws:
+                    msg_type = msg.type
+                    if msg_type == text_type:
+                        if _is_status_frame(msg.data):
+                            logger.debug("Status message: %.100s", msg.data)
+                            continue
+                        try:
+                            data = orjson.loads(msg.data)
+                        except orjson.JSONDecodeError:
+                            logger.warning(f"Failed to decode JSON: {msg.data[:100]}")
+                            continue
+                        
+                        # Check for errors
+                        if "error" in data:
+                            logger.error(f"ElevenLabs error: {data['error']}")
+                            raise Exception(f"ElevenLabs API error: {data['error']}")
+                        
+                        audio_b64 = data.get("audio")
+                        is_final = data.get("isFinal", False)
+                        
+                        if is_final:
+                            logger.info("Received final chunk marker")
                             break
-                    
-                    # Yield final marker
-                    logger.info(f"Stream complete. Total chunks: {chunk_index}")
-                    yield AudioChunk(
-                        audio_bytes=b"",
-                        char_start_times_ms=[],
-                        char_durations_ms=[],
-                        chars=[],
-                        chunk_index=chunk_index,
-                        is_final=True,
-                    )
+                        
+                        if not audio_b64:
+                            # Could be a status message, continue
+                            logger.debug("Non-audio message: %.100s", data)
+                            continue
+                        
+                        # Decode audio
+                        audio_bytes = decode_audio(audio_b64)
+                        
+                        # Extract alignment data
+                        # ElevenLabs provides normalizedAlignment with character timings
+                        alignment = data.get("normalizedAlignment") or data.get("alignment")
+                        if alignment:
+                            if extract_alignment is None:
+                                extract_alignment = _detect_extractor(alignment)
+                            chunk_char_times, chunk_char_durations, chunk_chars = extract_alignment(alignment)
+                        else:
+                            chunk_char_times = chunk_char_durations = chunk_chars = _EMPTY
+                        
+                        # Convert to absolute times (add offset)
+                        offset_ms = offset_samples * 1000 // sample_rate
+                        absolute_times = [t + offset_ms for t in chunk_char_times]
+                        
+                        # Calculate chunk duration for next offset
+                        # Based on audio bytes: PCM 16-bit mono, 2 bytes per sample
+                        samples = len(audio_bytes) >> 1
+                        audio_duration_ms = samples * 1000 // sample_rate
+                        offset_samples += samples
+                        
+                        logger.debug(
+                            "Chunk %d: %d bytes, %d chars, duration: %dms",
+                            chunk_index, len(audio_bytes), len(chunk_chars), audio_duration_ms
+                        )
+                        
+                        yield AudioChunk(
+                            audio_bytes=audio_bytes,
+                            char_start_times_ms=absolute_times,
+                            char_durations_ms=chunk_char_durations,
+                            chars=chunk_chars,
+                            chunk_index=chunk_index,
+                        )
+                        chunk_index += 1
+                    elif msg_type == aiohttp.WSMsgType.ERROR:
+                        logger.error(f"WebSocket error: {ws.exception()}")
+                        break
+                    elif msg_type == aiohttp.WSMsgType.CLOSED:
+                        logger.info("WebSocket closed by server")
+                        break
                 
+                logger.info(f"Stream complete. Total chunks: {chunk_index}")
+            
         except aiohttp.ClientError as e:
             logger.error(f"WebSocket connection error: {e}")
             raise
@@ -232,34 +307,57 @@ class ElevenLabsStreamingSession:
         if not self.api_key:
             raise ValueError("ELEVEN_API_KEY not set in environment")
         
-        self._session: Optional[aiohttp.ClientSession] = None
         self._ws: Optional[aiohttp.ClientWebSocketResponse] = None
         self._started = False
         self._finished = False
-        self._offset_ms = 0
+        self._sample_rate = config.sample_rate
+        self._offset_samples = 0
         self._chunk_index = 0
+        # Alignment key casing, fixed on the first chunk that carries one
+        self._extract_alignment: Optional[Callable[[dict], tuple]] = None
         self._first_text_sent = False
+        
+        # Time to first byte: from the oldest unanswered text send to the next audio
+        self._unanswered_send_at: Optional[float] = None
+        self._last_progress_at = 0.0  # Last trigger or audio arrival (monotonic)
+        self._chars_since_trigger = 0
+        self.ttfb_ema_ms: Optional[float] = None  # Smoothed over the session
+        
+        # Fixed for the session's lifetime, built once
+        self._ws_url = self._build_ws_url()
+        self._first_message_extras = {
+            "voice_settings": {
+                "stability": config.stability,
+                "similarity_boost": config.similarity_boost,
+            },
+            "generation_config": {
+                "chunk_length_schedule": config.chunk_length_schedule,
+            },
+            "xi_api_key": self.api_key,
+        }
+        
+        # Text queued while a send is in flight goes out as one message
+        self._pending_text: list[str] = []
+        self._drain_task: Optional[asyncio.Task] = None
     
-    def _build_ws_url(self) -> str:
+    def _build_ws_url(self) -> URL:
         """Construct the WebSocket URL with query parameters."""
-        return (
-            f"{self.BASE_URL}/{self.config.voice_id}/stream-input"
-            f"?model_id={self.config.model_id}"
-            f"&output_format={self.config.output_format}"
-            f"&optimize_streaming_latency={self.config.optimize_streaming_latency}"
-            f"&sync_alignment=true"  # Enable character-level timing
-        )
+        return _stream_input_url(self.BASE_URL, self.config)
+    
+    @property
+    def closed(self) -> bool:
+        """True if the WebSocket was never opened or has been closed."""
+        return self._ws is None or self._ws.closed
     
     async def start(self):
         """Open the WebSocket connection."""
         if self._started:
             return
         
-        url = self._build_ws_url()
+        url = self._ws_url
         logger.info(f"Starting streaming session to: {url}")
         
-        self._session = aiohttp.ClientSession()
-        self._ws = await self._session.ws_connect(
+        self._ws = await get_http_session().ws_connect(
             url,
             headers={"xi-api-key": self.api_key}
         )
@@ -267,37 +365,59 @@ class ElevenLabsStreamingSession:
         logger.info("Streaming session started")
     
     async def send_text(self, text: str):
-        """Send a text chunk to be synthesized."""
+        """
+        Queue a text chunk to be synthesized.
+        Returns without waiting for the socket; chunks queued while a send is
+        in flight are joined into the next message.
+        """
         if not self._started or self._ws is None:
             raise RuntimeError("Session not started")
         if self._finished:
             raise RuntimeError("Session already finished")
         
+        if self._drain_task is not None and self._drain_task.done():
+            self._drain_task.result()  # Surface a failed previous send
+            self._drain_task = None
+        
+        self._pending_text.append(text)
+        if self._drain_task is None:
+            self._drain_task = asyncio.create_task(self._drain_pending_text())
+    
+    async def _drain_pending_text(self):
+        """Send queued text until the queue is empty."""
+        while self._pending_text:
+            text = "".join(self._pending_text)
+            self._pending_text.clear()
+            await self._send_text_message(text)
+    
+    async def _send_text_message(self, text: str):
+        """Send one text message to ElevenLabs."""
         # Smart try_trigger_generation usage:
         # - Always trigger on first chunk to start audio quickly
-        # - Don't trigger on subsequent chunks unless necessary
-        # - Let ElevenLabs handle scheduling based on chunk_length_schedule
-        use_try_trigger = not self._first_text_sent
-        
-        message = {
-            "text": text,
-            "try_trigger_generation": use_try_trigger,
-        }
-        
-        # Include voice settings and config on first message
-        if not self._first_text_sent:
-            message["voice_settings"] = {
-                "stability": self.config.stability,
-                "similarity_boost": self.config.similarity_boost,
-            }
-            message["generation_config"] = {
-                "chunk_length_schedule": self.config.chunk_length_schedule,
-            }
-            message["xi_api_key"] = self.api_key
+        # - Re-trigger only if enough text is waiting and audio has stalled
+        # - Otherwise let ElevenLabs handle scheduling (chunk_length_schedule)
+        now = time.monotonic()
+        self._chars_since_trigger += len(text)
+        if self._first_text_sent:
+            use_try_trigger = (
+                self._chars_since_trigger > RETRIGGER_MIN_CHARS
+                and now - self._last_progress_at > RETRIGGER_AFTER_S
+            )
+            message = {"text": text, "try_trigger_generation": use_try_trigger}
+        else:
+            # Include voice settings and config on first message
+            use_try_trigger = True
+            message = {**self._first_message_extras, "text": text, "try_trigger_generation": True}
             self._first_text_sent = True
         
-        logger.debug(f"Sending text chunk: {text[:50]}...")
-        await self._ws.send_json(message)
+        if use_try_trigger:
+            self._chars_since_trigger = 0
+            self._last_progress_at = now
+        
+        logger.debug("Sending text chunk: %.50s...", text)
+        await self._ws.send_str(orjson.dumps(message).decode())
+        if self._unanswered_send_at is None:
+            self._unanswered_send_at = now
     
     async def finish(self):
         """Signal end of text input."""
@@ -306,8 +426,12 @@ class ElevenLabsStreamingSession:
         if self._finished:
             return
         
+        # Queued text must go out before the end-of-input signal
+        if self._drain_task is not None:
+            await self._drain_task
+        
         # Send empty string to signal end of input
-        await self._ws.send_json({"text": ""})
+        await self._ws.send_str(_END_OF_INPUT)
         self._finished = True
         logger.info("Sent end-of-input signal")
     
@@ -316,11 +440,21 @@ class ElevenLabsStreamingSession:
         if not self._started or self._ws is None:
             raise RuntimeError("Session not started")
         
-        async for msg in self._ws:
-            if msg.type == aiohttp.WSMsgType.TEXT:
+        # Loop-invariant lookups bound once for the per-chunk loop
+        ws = self._ws
+        sample_rate = self._sample_rate
+        text_type = aiohttp.WSMsgType.TEXT
+        decode_audio = binascii.a2b_base64
+        
+        async for msg in ws:
+            msg_type = msg.type
+            if msg_type == text_type:
+                if _is_status_frame(msg.data):
+                    logger.debug("Status message: %.100s", msg.data)
+                    continue
                 try:
-                    data = json.loads(msg.data)
-                except json.JSONDecodeError:
+                    data = orjson.loads(msg.data)
+                except orjson.JSONDecodeError:
                     logger.warning(f"Failed to decode JSON: {msg.data[:100]}")
                     continue
                 
@@ -337,30 +471,40 @@ class ElevenLabsStreamingSession:
                     break
                 
                 if not audio_b64:
-                    logger.debug(f"Non-audio message: {str(data)[:100]}")
+                    logger.debug("Non-audio message: %.100s", data)
                     continue
                 
+                self._last_progress_at = time.monotonic()
+                if self._unanswered_send_at is not None:
+                    self._record_ttfb((self._last_progress_at - self._unanswered_send_at) * 1000)
+                    self._unanswered_send_at = None
+                
                 # Decode audio
-                audio_bytes = base64.b64decode(audio_b64)
+                audio_bytes = decode_audio(audio_b64)
                 
                 # Extract alignment data
-                alignment = data.get("normalizedAlignment") or data.get("alignment") or {}
-                if alignment is None:
-                    alignment = {}
-                chunk_char_times = alignment.get("charStartTimesMs") or alignment.get("char_start_times_ms") or []
-                chunk_char_durations = alignment.get("charDurationsMs") or alignment.get("char_durations_ms") or []
-                chunk_chars = alignment.get("chars") or []
+                alignment = data.get("normalizedAlignment") or data.get("alignment")
+                if alignment:
+                    if self._extract_alignment is None:
+                        self._extract_alignment = _detect_extractor(alignment)
+                    chunk_char_times, chunk_char_durations, chunk_chars = self._extract_alignment(alignment)
+                else:
+                    chunk_char_times = chunk_char_durations = chunk_chars = _EMPTY
                 
                 # Convert to absolute times
-                absolute_times = [t + self._offset_ms for t in chunk_char_times]
+                offset_samples = self._offset_samples
+                offset_ms = offset_samples * 1000 // sample_rate
+                absolute_times = [t + offset_ms for t in chunk_char_times]
                 
-                # Calculate chunk duration
-                audio_duration_ms = int(len(audio_bytes) / (2 * 22050) * 1000)
-                self._offset_ms += audio_duration_ms
+                # Calculate chunk duration (PCM 16-bit mono, 2 bytes per sample)
+                samples = len(audio_bytes) >> 1
+                audio_duration_ms = samples * 1000 // sample_rate
+                self._offset_samples = offset_samples + samples
                 
+                chunk_index = self._chunk_index
                 logger.debug(
-                    f"Chunk {self._chunk_index}: {len(audio_bytes)} bytes, "
-                    f"{len(chunk_chars)} chars, duration: {audio_duration_ms}ms"
+                    "Chunk %d: %d bytes, %d chars, duration: %dms",
+                    chunk_index, len(audio_bytes), len(chunk_chars), audio_duration_ms
                 )
                 
                 yield AudioChunk(
@@ -368,32 +512,30 @@ class ElevenLabsStreamingSession:
                     char_start_times_ms=absolute_times,
                     char_durations_ms=chunk_char_durations,
                     chars=chunk_chars,
-                    chunk_index=self._chunk_index,
+                    chunk_index=chunk_index,
                 )
-                self._chunk_index += 1
-            elif msg.type == aiohttp.WSMsgType.ERROR:
-                logger.error(f"WebSocket error: {self._ws.exception()}")
+                self._chunk_index = chunk_index + 1
+            elif msg_type == aiohttp.WSMsgType.ERROR:
+                logger.error(f"WebSocket error: {ws.exception()}")
                 break
-            elif msg.type == aiohttp.WSMsgType.CLOSED:
+            elif msg_type == aiohttp.WSMsgType.CLOSED:
                 logger.info("WebSocket closed by server")
                 break
-        
-        # Yield final marker
-        yield AudioChunk(
-            audio_bytes=b"",
-            char_start_times_ms=[],
-            char_durations_ms=[],
-            chars=[],
-            chunk_index=self._chunk_index,
-            is_final=True,
-        )
+    
+    def _record_ttfb(self, ttfb_ms: float):
+        """Fold one time-to-first-byte sample into the session average."""
+        if self.ttfb_ema_ms is None:
+            self.ttfb_ema_ms = ttfb_ms
+        else:
+            self.ttfb_ema_ms += 0.3 * (ttfb_ms - self.ttfb_ema_ms)
     
     async def close(self):
         """Close the session."""
+        if self._drain_task is not None and not self._drain_task.done():
+            self._drain_task.cancel()
+        self._pending_text.clear()
         if self._ws:
             await self._ws.close()
-        if self._session:
-            await self._session.close()
         self._started = False
         logger.info("Streaming session closed")
 
@@ -435,13 +577,11 @@ async def _test_stream():
     total_chars = 0
     
     async for chunk in streamer.stream_text(test_text):
-        if chunk.is_final:
-            print(f"\nStream complete! Total: {total_bytes} bytes, {total_chars} chars")
-            break
-        
         total_bytes += len(chunk.audio_bytes)
         total_chars += len(chunk.chars)
         print(f"Chunk {chunk.chunk_index}: {len(chunk.audio_bytes)} bytes, chars: {''.join(chunk.chars)}")
+    
+    print(f"\nStream complete! Total: {total_bytes} bytes, {total_chars} chars")
 
 
 if __name__ == "__main__":
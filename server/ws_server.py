@@ -6,6 +6,9 @@ Architecture:
 - Agent connects to /agent endpoint and sends text chunks
 - Flutter connects to /client endpoint and receives audio
 - ONE ElevenLabs session per response, audio broadcast to ALL Flutter clients
+- Flutter clients connecting with ?format=binary get each chunk as a
+  chunk_meta JSON frame followed by the raw PCM as a binary frame;
+  others get the audio base64-encoded inside a "chunk" JSON frame
 
 Flow:
 1. Flutter connects to /client (waits for audio)
@@ -18,32 +21,55 @@ Flow:
 """
 
 import asyncio
+import atexit
 import base64
-import json
+from array import array
 import logging
+import logging.handlers
 import os
-from datetime import datetime
-from typing import Optional, Set
+import queue
+import sys
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional, Set
+import orjson
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
-from tts_streamer import ElevenLabsStreamer, ElevenLabsStreamingSession, StreamConfig, AudioChunk
+from tts_streamer import ElevenLabsStreamer, ElevenLabsStreamingSession, StreamConfig, AudioChunk, close_http_session
 from file_logger import AlignmentLogger
 
 load_dotenv()
 
+# Configure logging - records are queued and written by a background thread
+_log_handlers = [
+    logging.FileHandler('tts_server.log'),
+    logging.StreamHandler()
+]
+for _handler in _log_handlers:
+    _handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_log_listener = logging.handlers.QueueListener(_log_queue, *_log_handlers)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
 logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('tts_server.log'),
-        logging.StreamHandler()
-    ]
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format='%(message)s',  # Full format is applied by the listener's handlers
+    handlers=[logging.handlers.QueueHandler(_log_queue)]
 )
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="TTS Streaming Server")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Log the event loop in use; close the shared ElevenLabs HTTP session on shutdown."""
+    logger.info(f"Event loop: {type(asyncio.get_running_loop()).__module__}")
+    yield
+    await close_http_session()
+
+
+app = FastAPI(title="TTS Streaming Server", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -56,9 +82,139 @@ app.add_middleware(
 # Configuration
 VOICE_ID = os.getenv("ELEVEN_VOICE_ID")
 MODEL_ID = os.getenv("ELEVEN_MODEL", "eleven_flash_v2_5")
-OPTIMIZE_LATENCY = int(os.getenv("ELEVEN_OPTIMIZE_LATENCY", "4"))
+AUTO_MODE = os.getenv("ELEVEN_AUTO_MODE", "true").lower() == "true"
 LOG_ALIGNMENT = os.getenv("LOG_ALIGNMENT", "true").lower() == "true"
 
+# Configs are built once; sessions and streamers only read them
+SESSION_CONFIG = StreamConfig(
+    voice_id=VOICE_ID,
+    model_id=MODEL_ID,
+    chunk_length_schedule=[50, 150, 300, 300],  # Optimized for low latency
+    auto_mode=AUTO_MODE,  # Agent streams word by word, let ElevenLabs chunk
+)
+SINGLE_SHOT_CONFIG = StreamConfig(
+    voice_id=VOICE_ID,
+    model_id=MODEL_ID,
+)
+
+# Both session types use the default pcm_22050 output: 16-bit mono PCM
+_PCM_BYTES_PER_SECOND = 2 * 22050
+
+# A pre-opened ElevenLabs socket is kept this long for the next response
+# (ElevenLabs drops stream-input sockets that stay idle for 20s)
+SPARE_SESSION_MAX_AGE = 15.0
+
+# A client whose send takes longer than this is dropped from broadcasts
+CLIENT_SEND_TIMEOUT = 2.0
+
+# Close code for clients dropped as too slow (1013: try again later)
+SLOW_CLIENT_CLOSE_CODE = 1013
+
+_INVALID_JSON = '{"type":"error","message":"Invalid JSON"}'
+_PONG = '{"type":"pong"}'
+
+
+async def send_message(websocket: WebSocket, message: dict):
+    """Send a JSON message as a text frame, encoded with orjson."""
+    await websocket.send_text(orjson.dumps(message).decode())
+
+
+# Chunk frames have a fixed shape, so they are assembled from their
+# serialized fields instead of building and encoding a dict per chunk
+def _chunk_fields(chunk: AudioChunk, chunk_index: int) -> bytes:
+    """Serialize the alignment fields shared by both chunk frame formats."""
+    return b'"chunk_index":%d,"chars":%b,"char_times":%b,"char_durations":%b' % (
+        chunk_index,
+        orjson.dumps(chunk.chars),
+        orjson.dumps(chunk.char_start_times_ms),
+        orjson.dumps(chunk.char_durations_ms),
+    )
+
+
+def _chunk_with_b64_audio(fields: bytes, audio: bytes) -> str:
+    """Build a chunk frame with its audio inline as base64."""
+    return (b'{"type":"chunk",%b,"audio":"%b"}' % (fields, base64.b64encode(audio))).decode()
+
+
+def _chunk_meta(fields: bytes, audio: bytes) -> str:
+    """Build the chunk_meta frame that precedes a binary audio frame."""
+    return (b'{"type":"chunk_meta",%b,"audio_bytes_len":%d}' % (fields, len(audio))).decode()
+
+
+async def _send_with_audio(websocket: WebSocket, meta_raw: str, audio: bytes):
+    """Send a chunk_meta frame and then the raw PCM as a binary frame."""
+    await websocket.send_text(meta_raw)
+    await websocket.send_bytes(audio)
+
+
+async def _bounded_send(send):
+    """Await one client send, giving up after CLIENT_SEND_TIMEOUT."""
+    async with asyncio.timeout(CLIENT_SEND_TIMEOUT):
+        await send
+
+
+async def _close_dropped(websocket: WebSocket, code: int):
+    """Close a client that was dropped from broadcasts, ignoring close errors."""
+    try:
+        await websocket.close(code=code)
+    except Exception as e:
+        logger.debug("Closing dropped client failed: %s", e)
+
+
+def _merge_chunks(chunks: list[AudioChunk]) -> AudioChunk:
+    """Join consecutive chunks into one (alignment times are already absolute)."""
+    if len(chunks) == 1:
+        return chunks[0]
+    return AudioChunk(
+        audio_bytes=b"".join([c.audio_bytes for c in chunks]),
+        char_start_times_ms=[t for c in chunks for t in c.char_start_times_ms],
+        char_durations_ms=[d for c in chunks for d in c.char_durations_ms],
+        chars=[ch for c in chunks for ch in c.chars],
+        chunk_index=chunks[0].chunk_index,
+    )
+
+
+async def coalesce_chunks(chunks: AsyncIterator[AudioChunk]) -> AsyncIterator[AudioChunk]:
+    """
+    Re-yield audio chunks, merging the ones that arrived while the consumer
+    was busy sending. A slow send then costs one bigger frame instead of a
+    backlog of small ones; when sends keep up, chunks pass through as is.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    
+    async def pump():
+        try:
+            async for chunk in chunks:
+                queue.put_nowait(chunk)
+            queue.put_nowait(None)
+        except Exception as e:
+            queue.put_nowait(e)
+    
+    pump_task = asyncio.create_task(pump())
+    try:
+        while True:
+            items = [await queue.get()]
+            while not queue.empty():
+                items.append(queue.get_nowait())
+            
+            # The end marker or an error can only be the last item
+            end = items[-1]
+            if end is None or isinstance(end, Exception):
+                items.pop()
+            if items:
+                yield _merge_chunks(items)
+            if end is None:
+                return
+            if isinstance(end, Exception):
+                raise end
+    finally:
+        pump_task.cancel()
+
+
+def wants_binary_audio(websocket: WebSocket) -> bool:
+    """Clients opt in to binary audio frames with ?format=binary."""
+    return websocket.query_params.get("format") == "binary"
+
 
 class TTSBroadcaster:
     """
@@ -67,42 +223,53 @@ class TTSBroadcaster:
     
     def __init__(self):
         self._flutter_clients: Set[WebSocket] = set()
+        self._binary_clients: Set[WebSocket] = set()  # Take audio as binary frames
+        self._slow_client_drops = 0  # Clients dropped for a send timeout
+        self._closing_tasks: Set[asyncio.Task] = set()  # Closes of dropped clients
         self._agent_ws: Optional[WebSocket] = None
         
         # Current TTS session
         self._el_session: Optional[ElevenLabsStreamingSession] = None
+        self._spare_session: Optional[ElevenLabsStreamingSession] = None  # Opened ahead of time
+        self._spare_task: Optional[asyncio.Task] = None
         self._audio_task: Optional[asyncio.Task] = None
         self._is_streaming = False
         self._lock = asyncio.Lock()
         
         # Tracking for current response
-        self._full_text = ""
+        self._text_parts: list[str] = []  # Joined once at finish
         self._all_chars: list[str] = []
-        self._all_times: list[int] = []
-        self._all_durations: list[int] = []
+        self._all_times = array("i")  # Packed ints, no per-item objects
+        self._all_durations = array("i")
         self._total_audio_ms = 0
         self._chunk_count = 0
-        self._start_time: Optional[datetime] = None
+        self._start_time: Optional[float] = None  # time.monotonic()
         
-        # Alignment logger
+        # Alignment logger; files are written by one background task
         self._alignment_logger = AlignmentLogger() if LOG_ALIGNMENT else None
+        self._alignment_queue: Optional[asyncio.Queue] = None
+        self._alignment_writer: Optional[asyncio.Task] = None
         
         logger.info("TTSBroadcaster initialized")
     
-    def add_flutter_client(self, ws: WebSocket):
+    def add_flutter_client(self, ws: WebSocket, binary: bool = False):
         """Register a Flutter client to receive audio."""
         self._flutter_clients.add(ws)
+        if binary:
+            self._binary_clients.add(ws)
         logger.info(f"Flutter client added. Total: {len(self._flutter_clients)}")
     
     def remove_flutter_client(self, ws: WebSocket):
         """Unregister a Flutter client."""
         self._flutter_clients.discard(ws)
+        self._binary_clients.discard(ws)
         logger.info(f"Flutter client removed. Total: {len(self._flutter_clients)}")
     
     def set_agent(self, ws: WebSocket):
         """Set the agent WebSocket."""
         self._agent_ws = ws
         logger.info("Agent connected")
+        self._prepare_spare_session()
     
     def clear_agent(self):
         """Clear the agent WebSocket."""
@@ -115,16 +282,80 @@ class TTSBroadcaster:
             logger.warning("No Flutter clients to broadcast to")
             return
         
-        disconnected = set()
-        for client in self._flutter_clients:
+        # Serialize once; every client gets the same frame
+        await self.broadcast_text(orjson.dumps(message).decode())
+    
+    async def broadcast_chunk(self, chunk: AudioChunk, chunk_index: int):
+        """
+        Broadcast an audio chunk to all Flutter clients.
+        Binary clients get chunk_meta followed by a binary audio frame;
+        other clients get the audio inline as base64.
+        """
+        if not self._flutter_clients:
+            logger.warning("No Flutter clients to broadcast to")
+            return
+        
+        # Encode each format at most once, only if a client needs it
+        audio = chunk.audio_bytes
+        fields = _chunk_fields(chunk, chunk_index)
+        clients = list(self._flutter_clients)
+        meta_raw = b64_raw = None
+        sends = []
+        for client in clients:
+            if client in self._binary_clients:
+                if meta_raw is None:
+                    meta_raw = _chunk_meta(fields, audio)
+                sends.append(_send_with_audio(client, meta_raw, audio))
+            else:
+                if b64_raw is None:
+                    b64_raw = _chunk_with_b64_audio(fields, audio)
+                sends.append(client.send_text(b64_raw))
+        await self._gather_sends(clients, sends)
+    
+    async def broadcast_text(self, raw: str):
+        """Send an already-serialized text frame to all Flutter clients."""
+        clients = list(self._flutter_clients)
+        await self._gather_sends(clients, [client.send_text(raw) for client in clients])
+    
+    async def _gather_sends(self, clients: list[WebSocket], sends: list):
+        """
+        Run one send per client concurrently and drop clients whose send failed.
+        Dropped clients are closed in the background, so a client cut off
+        between a chunk_meta frame and its audio frame never sees a later chunk.
+        """
+        # Bounded so a stalled client doesn't hold up the next chunk. The
+        # usual single client is awaited inline (no task per frame); several
+        # run concurrently so a slow one doesn't hold up the rest
+        if len(sends) == 1:
             try:
-                await client.send_json(message)
+                await _bounded_send(sends[0])
+                results = [None]
             except Exception as e:
-                logger.error(f"Failed to send to client: {e}")
+                results = [e]
+        else:
+            results = await asyncio.gather(
+                *(_bounded_send(send) for send in sends),
+                return_exceptions=True,
+            )
+        
+        disconnected = set()
+        for client, result in zip(clients, results):
+            if isinstance(result, asyncio.TimeoutError):
+                logger.error(f"Client send timed out after {CLIENT_SEND_TIMEOUT}s, dropping it")
+                self._slow_client_drops += 1
+                disconnected.add(client)
+            elif isinstance(result, Exception):
+                logger.error(f"Failed to send to client: {result}")
                 disconnected.add(client)
         
         # Remove disconnected clients
         self._flutter_clients -= disconnected
+        self._binary_clients -= disconnected
+        for client in disconnected:
+            # Not awaited: closing a stalled socket can block as long as the send did
+            task = asyncio.create_task(_close_dropped(client, SLOW_CLIENT_CLOSE_CODE))
+            self._closing_tasks.add(task)
+            task.add_done_callback(self._closing_tasks.discard)
     
     async def handle_append_text(self, text: str):
         """Handle text chunk from agent."""
@@ -134,8 +365,8 @@ class TTSBroadcaster:
             
             if self._el_session:
                 await self._el_session.send_text(text)
-                self._full_text += text
-                logger.debug(f"Appended text: {text[:50]}...")
+                self._text_parts.append(text)
+                logger.debug("Appended text: %.50s...", text)
     
     async def handle_finish(self):
         """Handle finish signal from agent."""
@@ -155,27 +386,63 @@ class TTSBroadcaster:
                     logger.error("Audio task timed out")
                     self._audio_task.cancel()
             
-            # Log alignment
-            if self._alignment_logger and self._full_text:
-                self._alignment_logger.save_alignment(
-                    text=self._full_text,
-                    chars=self._all_chars,
-                    times=self._all_times,
-                    durations=self._all_durations,
-                )
+            # Report TTS latency so the agent can size its text chunks
+            if self._agent_ws and self._el_session.ttfb_ema_ms is not None:
+                try:
+                    await send_message(self._agent_ws, {
+                        "type": "tts_stats",
+                        "ttfb_ms": round(self._el_session.ttfb_ema_ms),
+                    })
+                except Exception as e:
+                    logger.warning(f"Failed to send TTS stats to agent: {e}")
             
-            # Broadcast completion
-            await self.broadcast_to_clients({
-                "type": "complete",
-                "text": self._full_text,
-                "total_chars": len(self._all_chars),
-                "total_duration_ms": self._total_audio_ms,
-            })
+            full_text = "".join(self._text_parts)
             
-            elapsed = (datetime.now() - self._start_time).total_seconds() if self._start_time else 0
+            # Log alignment (written in the background, outside the lock)
+            if full_text:
+                self._queue_alignment(full_text, self._all_chars, self._all_times, self._all_durations)
+            
+            # Completion and socket teardown don't depend on each other
+            await asyncio.gather(
+                self.broadcast_to_clients({
+                    "type": "complete",
+                    "text": full_text,
+                    "total_chars": len(self._all_chars),
+                    "total_duration_ms": self._total_audio_ms,
+                }),
+                self._cleanup(),
+            )
+            
+            elapsed = time.monotonic() - self._start_time if self._start_time else 0
             logger.info(f"Session complete. Chunks: {self._chunk_count}, Duration: {self._total_audio_ms}ms, Time: {elapsed:.2f}s")
             
-            await self._cleanup()
+            # Have a socket ready in case the agent answers again soon
+            self._prepare_spare_session()
+    
+    def _queue_alignment(self, text: str, chars, times, durations):
+        """Hand an alignment log to the background writer."""
+        if not self._alignment_logger:
+            return
+        if self._alignment_queue is None:
+            self._alignment_queue = asyncio.Queue()
+        self._alignment_queue.put_nowait((text, chars, times, durations))
+        if self._alignment_writer is None or self._alignment_writer.done():
+            self._alignment_writer = asyncio.create_task(self._write_alignments())
+    
+    async def _write_alignments(self):
+        """Write queued alignment logs one at a time in a worker thread."""
+        while True:
+            text, chars, times, durations = await self._alignment_queue.get()
+            try:
+                await asyncio.to_thread(
+                    self._alignment_logger.save_alignment,
+                    text=text,
+                    chars=chars,
+                    times=times,
+                    durations=durations,
+                )
+            except Exception as e:
+                logger.error(f"Failed to save alignment: {e}")
     
     async def _start_session(self):
         """Start a new ElevenLabs streaming session."""
@@ -183,23 +450,19 @@ class TTSBroadcaster:
             await self._cleanup()
         
         # Reset state
-        self._full_text = ""
+        self._text_parts = []
         self._all_chars = []
-        self._all_times = []
-        self._all_durations = []
+        self._all_times = array("i")
+        self._all_durations = array("i")
         self._total_audio_ms = 0
         self._chunk_count = 0
-        self._start_time = datetime.now()
+        self._start_time = time.monotonic()
         
-        # Create ElevenLabs session with optimized settings
-        config = StreamConfig(
-            voice_id=VOICE_ID,
-            model_id=MODEL_ID,
-            optimize_streaming_latency=OPTIMIZE_LATENCY,
-            chunk_length_schedule=[50, 150, 300, 300],  # Optimized for low latency
-        )
-        self._el_session = ElevenLabsStreamingSession(config)
-        await self._el_session.start()
+        # Use the pre-opened session if there is one, skipping the handshake
+        self._el_session = self._take_spare_session()
+        if self._el_session is None:
+            self._el_session = ElevenLabsStreamingSession(SESSION_CONFIG)
+            await self._el_session.start()
         
         # Start background audio receiver
         self._audio_task = asyncio.create_task(self._receive_and_broadcast_audio())
@@ -207,43 +470,66 @@ class TTSBroadcaster:
         self._is_streaming = True
         logger.info("Started new ElevenLabs session")
     
+    def _prepare_spare_session(self):
+        """Open the next response's ElevenLabs socket in the background."""
+        if self._spare_task is None or self._spare_task.done():
+            self._spare_task = asyncio.create_task(self._hold_spare_session())
+    
+    async def _hold_spare_session(self):
+        """Open a session and keep it as the spare for SPARE_SESSION_MAX_AGE."""
+        session = ElevenLabsStreamingSession(SESSION_CONFIG)
+        try:
+            await session.start()
+            self._spare_session = session
+            await asyncio.sleep(SPARE_SESSION_MAX_AGE)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.warning(f"Failed to open spare ElevenLabs session: {e}")
+        finally:
+            # Close it unless _start_session took it
+            if self._spare_session is session:
+                self._spare_session = None
+                await session.close()
+    
+    def _take_spare_session(self) -> Optional[ElevenLabsStreamingSession]:
+        """Hand over the spare session if it is still open."""
+        session = self._spare_session
+        self._spare_session = None
+        if self._spare_task is not None:
+            self._spare_task.cancel()
+            self._spare_task = None
+        if session is None or session.closed:
+            return None  # Nothing held, or ElevenLabs already dropped it
+        logger.info("Using pre-opened ElevenLabs session")
+        return session
+    
     async def _receive_and_broadcast_audio(self):
         """Receive audio from ElevenLabs and broadcast to all Flutter clients."""
         try:
             first_chunk = True
             
-            async for chunk in self._el_session.receive_audio():
-                if chunk.is_final:
-                    logger.info("Received final audio marker")
-                    break
-                
+            async for chunk in coalesce_chunks(self._el_session.receive_audio()):
                 # Log first chunk timing
                 if first_chunk and self._start_time:
-                    ttfa = (datetime.now() - self._start_time).total_seconds() * 1000
+                    ttfa = (time.monotonic() - self._start_time) * 1000
                     logger.info(f"Time to first audio: {ttfa:.0f}ms")
                     first_chunk = False
                 
                 # Accumulate alignment data
-                self._all_chars.extend(chunk.chars)
+                self._all_chars += chunk.chars
                 self._all_times.extend(chunk.char_start_times_ms)
                 self._all_durations.extend(chunk.char_durations_ms)
                 
                 # Calculate audio duration
-                audio_duration_ms = int(len(chunk.audio_bytes) / (2 * 22050) * 1000)
+                audio_duration_ms = len(chunk.audio_bytes) * 1000 // _PCM_BYTES_PER_SECOND
                 self._total_audio_ms += audio_duration_ms
                 
                 # Broadcast to all Flutter clients
-                await self.broadcast_to_clients({
-                    "type": "chunk",
-                    "audio": base64.b64encode(chunk.audio_bytes).decode("utf-8"),
-                    "char_times": chunk.char_start_times_ms,
-                    "char_durations": chunk.char_durations_ms,
-                    "chars": chunk.chars,
-                    "chunk_index": self._chunk_count,
-                })
+                await self.broadcast_chunk(chunk, self._chunk_count)
                 
                 self._chunk_count += 1
-                logger.debug(f"Broadcast chunk {self._chunk_count}: {len(chunk.audio_bytes)} bytes")
+                logger.debug("Broadcast chunk %d: %d bytes", self._chunk_count, len(chunk.audio_bytes))
         
         except asyncio.CancelledError:
             logger.info("Audio task cancelled")
@@ -272,55 +558,39 @@ class TTSBroadcaster:
         """Handle single-shot TTS request (direct from Flutter)."""
         logger.info(f"Single-shot TTS: {text[:50]}...")
         
-        config = StreamConfig(
-            voice_id=VOICE_ID,
-            model_id=MODEL_ID,
-            optimize_streaming_latency=OPTIMIZE_LATENCY,
-        )
-        streamer = ElevenLabsStreamer(config)
+        streamer = ElevenLabsStreamer(SINGLE_SHOT_CONFIG)
+        binary = ws in self._binary_clients
         
-        start_time = datetime.now()
+        start_time = time.monotonic()
         chars = []
-        times = []
-        durations = []
+        times = array("i")
+        durations = array("i")
         total_ms = 0
         chunk_count = 0
         
         try:
-            async for chunk in streamer.stream_text(text):
-                if chunk.is_final:
-                    break
-                
+            async for chunk in coalesce_chunks(streamer.stream_text(text)):
                 if chunk_count == 0:
-                    ttfa = (datetime.now() - start_time).total_seconds() * 1000
+                    ttfa = (time.monotonic() - start_time) * 1000
                     logger.info(f"First chunk in {ttfa:.0f}ms")
                 
-                chars.extend(chunk.chars)
+                chars += chunk.chars
                 times.extend(chunk.char_start_times_ms)
                 durations.extend(chunk.char_durations_ms)
                 
-                audio_duration_ms = int(len(chunk.audio_bytes) / (2 * 22050) * 1000)
+                audio_duration_ms = len(chunk.audio_bytes) * 1000 // _PCM_BYTES_PER_SECOND
                 total_ms += audio_duration_ms
                 
-                await ws.send_json({
-                    "type": "chunk",
-                    "audio": base64.b64encode(chunk.audio_bytes).decode("utf-8"),
-                    "char_times": chunk.char_start_times_ms,
-                    "char_durations": chunk.char_durations_ms,
-                    "chars": chunk.chars,
-                    "chunk_index": chunk_count,
-                })
+                fields = _chunk_fields(chunk, chunk_count)
+                if binary:
+                    await _send_with_audio(ws, _chunk_meta(fields, chunk.audio_bytes), chunk.audio_bytes)
+                else:
+                    await ws.send_text(_chunk_with_b64_audio(fields, chunk.audio_bytes))
                 chunk_count += 1
             
-            if self._alignment_logger:
-                self._alignment_logger.save_alignment(
-                    text=text,
-                    chars=chars,
-                    times=times,
-                    durations=durations,
-                )
+            self._queue_alignment(text, chars, times, durations)
             
-            await ws.send_json({
+            await send_message(ws, {
                 "type": "complete",
                 "text": text,
                 "total_chars": len(chars),
@@ -331,13 +601,36 @@ class TTSBroadcaster:
         
         except Exception as e:
             logger.error(f"Single-shot error: {e}")
-            await ws.send_json({"type": "error", "message": str(e)})
+            await send_message(ws, {"type": "error", "message": str(e)})
 
 
 # Global broadcaster
 broadcaster = TTSBroadcaster()
 
 
+async def iter_messages(websocket: WebSocket) -> AsyncIterator[dict]:
+    """
+    Yield JSON messages sent as either text or binary frames.
+    Binary frames go to orjson as is, without a UTF-8 decode to str first;
+    the agent sends its messages that way.
+    Invalid JSON gets an error reply and is skipped.
+    """
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+        
+        raw = message.get("bytes")
+        if raw is None:
+            raw = message["text"]
+        try:
+            data = orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            await websocket.send_text(_INVALID_JSON)
+            continue
+        yield data
+
+
 @app.websocket("/client")
 async def flutter_client_endpoint(websocket: WebSocket):
     """
@@ -345,26 +638,21 @@ async def flutter_client_endpoint(websocket: WebSocket):
     Flutter connects here and receives audio chunks broadcast from agent's TTS.
     """
     await websocket.accept()
-    broadcaster.add_flutter_client(websocket)
+    broadcaster.add_flutter_client(websocket, binary=wants_binary_audio(websocket))
     logger.info("Flutter client connected to /client")
     
     try:
-        while True:
-            try:
-                data = await websocket.receive_json()
-                action = data.get("action")
-                
-                if action == "start_tts":
-                    # Single-shot TTS directly from Flutter
-                    text = data.get("text", "")
-                    if text:
-                        await broadcaster.handle_single_shot(websocket, text)
-                
-                elif action == "ping":
-                    await websocket.send_json({"type": "pong"})
-                
-            except json.JSONDecodeError:
-                await websocket.send_json({"type": "error", "message": "Invalid JSON"})
+        async for data in iter_messages(websocket):
+            action = data.get("action")
+            
+            if action == "start_tts":
+                # Single-shot TTS directly from Flutter
+                text = data.get("text", "")
+                if text:
+                    await broadcaster.handle_single_shot(websocket, text)
+            
+            elif action == "ping":
+                await websocket.send_text(_PONG)
     
     except WebSocketDisconnect:
         logger.info("Flutter client disconnected")
@@ -383,24 +671,19 @@ async def agent_endpoint(websocket: WebSocket):
     logger.info("Agent connected to /agent")
     
     try:
-        while True:
-            try:
-                data = await websocket.receive_json()
-                action = data.get("action")
-                
-                if action == "append_tts":
-                    text = data.get("text", "")
-                    if text:
-                        await broadcaster.handle_append_text(text)
-                
-                elif action == "finish_tts":
-                    await broadcaster.handle_finish()
-                
-                elif action == "ping":
-                    await websocket.send_json({"type": "pong"})
-                
-            except json.JSONDecodeError:
-                await websocket.send_json({"type": "error", "message": "Invalid JSON"})
+        async for data in iter_messages(websocket):
+            action = data.get("action")
+            
+            if action == "append_tts":
+                text = data.get("text", "")
+                if text:
+                    await broadcaster.handle_append_text(text)
+            
+            elif action == "finish_tts":
+                await broadcaster.handle_finish()
+            
+            elif action == "ping":
+                await websocket.send_text(_PONG)
     
     except WebSocketDisconnect:
         logger.info("Agent disconnected")
@@ -417,40 +700,35 @@ async def legacy_endpoint(websocket: WebSocket):
     """
     await websocket.accept()
     is_agent = False
-    broadcaster.add_flutter_client(websocket)
+    broadcaster.add_flutter_client(websocket, binary=wants_binary_audio(websocket))
     logger.info("Client connected to /stream_tts (legacy)")
     
     try:
-        while True:
-            try:
-                data = await websocket.receive_json()
-                action = data.get("action")
-                
-                if action == "append_tts":
-                    # This is an agent connection
-                    if not is_agent:
-                        is_agent = True
-                        broadcaster.remove_flutter_client(websocket)
-                        broadcaster.set_agent(websocket)
-                        logger.info("Legacy client promoted to agent")
-                    
-                    text = data.get("text", "")
-                    if text:
-                        await broadcaster.handle_append_text(text)
-                
-                elif action == "finish_tts":
-                    await broadcaster.handle_finish()
-                
-                elif action == "start_tts":
-                    text = data.get("text", "")
-                    if text:
-                        await broadcaster.handle_single_shot(websocket, text)
-                
-                elif action == "ping":
-                    await websocket.send_json({"type": "pong"})
+        async for data in iter_messages(websocket):
+            action = data.get("action")
+            
+            if action == "append_tts":
+                # This is an agent connection
+                if not is_agent:
+                    is_agent = True
+                    broadcaster.remove_flutter_client(websocket)
+                    broadcaster.set_agent(websocket)
+                    logger.info("Legacy client promoted to agent")
                 
-            except json.JSONDecodeError:
-                await websocket.send_json({"type": "error", "message": "Invalid JSON"})
+                text = data.get("text", "")
+                if text:
+                    await broadcaster.handle_append_text(text)
+            
+            elif action == "finish_tts":
+                await broadcaster.handle_finish()
+            
+            elif action == "start_tts":
+                text = data.get("text", "")
+                if text:
+                    await broadcaster.handle_single_shot(websocket, text)
+            
+            elif action == "ping":
+                await websocket.send_text(_PONG)
     
     except WebSocketDisconnect:
         logger.info("Legacy client disconnected")
@@ -468,6 +746,7 @@ async def health():
         "flutter_clients": len(broadcaster._flutter_clients),
         "agent_connected": broadcaster._agent_ws is not None,
         "is_streaming": broadcaster._is_streaming,
+        "slow_client_drops": broadcaster._slow_client_drops,
     }
 
 
@@ -480,4 +759,6 @@ if __name__ == "__main__":
     
     port = int(os.getenv("TTS_WS_PORT", 8081))
     logger.info(f"Starting TTS server on port {port}")
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    # uvloop + httptools on Linux/macOS; uvloop doesn't support Windows
+    loop = "asyncio" if sys.platform == "win32" else "uvloop"
+    uvicorn.run(app, host="0.0.0.0", port=port, loop=loop, http="httptools", ws="websockets")